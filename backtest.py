@@ -0,0 +1,200 @@
+import argparse
+import itertools
+import time
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone, timedelta
+from bar_store import BarStore
+from rvol_curve import SESSION_MINUTES, session_minutes
+
+BACKTEST_SYMBOLS = ["/MES", "/MNQ", "/CL", "/GC", "^GSPC", "^NDX"]
+BAR_MINUTES = 5
+# yfinance only serves 5m bars for the last 60 days.
+BACKTEST_DAYS = 59
+DEFAULT_RANGE_MINUTES = 30
+DEFAULT_GRID = {
+    "range_minutes": [15, 30, 60],
+    "prob_scaler": [0.1, 0.2, 0.3, 0.4, 0.5],
+    "rr_ratio": [1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0]
+}
+
+
+def yahoo_symbol(symbol):
+    return f"{symbol[1:]}=F" if symbol.startswith("/") else symbol
+
+
+def session_matrix(bars, bar_minutes=BAR_MINUTES):
+    # One row per session day and one column per bar slot of the 9:30-16:00 ET
+    # cash session; missing bars stay NaN so every comparison on them is False.
+    minutes, dates = session_minutes(bars["ts"])
+    keep = (minutes >= 0) & (minutes < SESSION_MINUTES)
+    days, rows = np.unique(np.asarray(dates)[keep], return_inverse=True)
+    columns = minutes[keep] // bar_minutes
+    shape = (len(days), SESSION_MINUTES // bar_minutes)
+    matrices = {}
+    for field in ("high", "low", "close"):
+        matrix = matrices[field] = np.full(shape, np.nan)
+        matrix[rows, columns] = bars[field][keep]
+    return days, matrices
+
+
+def load_sessions(symbols=BACKTEST_SYMBOLS, days=BACKTEST_DAYS, store=None):
+    store = store or BarStore()
+    end = datetime.now(timezone.utc).date() - timedelta(days=1)
+    parts = []
+    for index, symbol in enumerate(symbols):
+        bars = store.ensure(yahoo_symbol(symbol), f"{BAR_MINUTES}m", end - timedelta(days=days - 1), end)
+        if not len(bars):
+            print(f"No {BAR_MINUTES}m bars cached for {symbol}, leaving it out of the backtest")
+            continue
+        session_days, matrices = session_matrix(bars)
+        parts.append((np.full(len(session_days), index), session_days, matrices))
+    if not parts:
+        return None
+    symbol_index = np.concatenate([part[0] for part in parts])
+    session_days = np.concatenate([part[1] for part in parts])
+    # Rows run in calendar order so the equity curve (and its drawdown) plays
+    # out the way the trades would have been taken.
+    order = np.lexsort((symbol_index, session_days))
+    sessions = {"symbols": list(symbols), "symbol": symbol_index[order], "day": session_days[order]}
+    for field in ("high", "low", "close"):
+        sessions[field] = np.concatenate([part[2][field] for part in parts])[order]
+    return sessions
+
+
+def first_true(mask):
+    # Column of the first True per row, or the row length when there is none.
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def breakout_entries(sessions, range_minutes):
+    # Opening range over the first `range_minutes`; the first bar after it to
+    # trade through either edge is the entry. A bar that breaks both edges is
+    # ambiguous on 5m data and is skipped.
+    span = max(range_minutes // BAR_MINUTES, 1)
+    highs, lows = sessions["high"], sessions["low"]
+    with warnings.catch_warnings():
+        # Sessions with no bars in the opening range give all-NaN slices.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        up = np.nanmax(highs[:, :span], axis=1)
+        down = np.nanmin(lows[:, :span], axis=1)
+    highs, lows, closes = highs[:, span:], lows[:, span:], sessions["close"][:, span:]
+    long_at = first_true(highs > up[:, None])
+    short_at = first_true(lows < down[:, None])
+    is_long = long_at < short_at
+    traded = (is_long | (short_at < long_at)) & (up > down)
+    entry_at = np.where(is_long, long_at, short_at)
+    side = np.where(is_long, 1.0, -1.0)
+    has_close = ~np.isnan(closes)
+    last_close = closes[np.arange(len(closes)), closes.shape[1] - 1 - first_true(has_close[:, ::-1])]
+    return {
+        "highs": highs,
+        "lows": lows,
+        "after": np.arange(highs.shape[1])[None, :] >= entry_at[:, None],
+        "traded": traded & has_close.any(axis=1),
+        "side": side,
+        "entry": np.where(is_long, up, down),
+        "width": up - down,
+        "last_close": last_close
+    }
+
+
+def trade_results(entries, prob_scaler, rr_ratio):
+    # R multiple per session: +rr_ratio at target, -1 at stop, marked to the
+    # session close otherwise. The stop sits prob_scaler x the opening range
+    # beyond the entry; a bar touching both stop and target counts as a stop.
+    side, entry = entries["side"], entries["entry"]
+    risk = entries["width"] * prob_scaler
+    stop = (entry - side * risk)[:, None]
+    target = (entry + side * rr_ratio * risk)[:, None]
+    highs, lows, after = entries["highs"], entries["lows"], entries["after"]
+    is_long = (side > 0)[:, None]
+    with np.errstate(invalid="ignore"):
+        stop_at = first_true(after & np.where(is_long, lows <= stop, highs >= stop))
+        target_at = first_true(after & np.where(is_long, highs >= target, lows <= target))
+        marked = side * (entries["last_close"] - entry) / risk
+    result = np.where(target_at < stop_at, rr_ratio, np.where(stop_at < highs.shape[1], -1.0, marked))
+    return np.where(entries["traded"] & (risk > 0), result, np.nan)
+
+
+def summarize(results):
+    taken = results[~np.isnan(results)]
+    if not len(taken):
+        return {"trades": 0, "hit_rate": 0.0, "expectancy": 0.0, "total_r": 0.0, "max_drawdown": 0.0}
+    equity = np.cumsum(taken)
+    peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    return {
+        "trades": int(len(taken)),
+        "hit_rate": round(float((taken > 0).mean()), 4),
+        "expectancy": round(float(taken.mean()), 4),
+        "total_r": round(float(equity[-1]), 4),
+        "max_drawdown": round(float((peak - equity).max()), 4)
+    }
+
+
+def evaluate(sessions, range_minutes, prob_scaler, rr_ratio):
+    results = trade_results(breakout_entries(sessions, range_minutes), prob_scaler, rr_ratio)
+    row = {"range_minutes": range_minutes, "prob_scaler": prob_scaler, "rr_ratio": rr_ratio}
+    row.update(summarize(results))
+    row["by_symbol"] = {symbol: summarize(results[sessions["symbol"] == index])["expectancy"]
+                        for index, symbol in enumerate(sessions["symbols"]) if (sessions["symbol"] == index).any()}
+    return row
+
+
+_worker_sessions = None
+
+
+def _init_worker(sessions):
+    # Sessions ship to each worker once instead of with every task.
+    global _worker_sessions
+    _worker_sessions = sessions
+
+
+def _sweep_range(range_minutes, prob_scalers, rr_ratios):
+    entries = breakout_entries(_worker_sessions, range_minutes)
+    rows = []
+    for prob_scaler, rr_ratio in itertools.product(prob_scalers, rr_ratios):
+        row = {"range_minutes": range_minutes, "prob_scaler": prob_scaler, "rr_ratio": rr_ratio}
+        row.update(summarize(trade_results(entries, prob_scaler, rr_ratio)))
+        rows.append(row)
+    return rows
+
+
+def sweep(sessions, grid=None, workers=None):
+    # Entries depend only on the opening range, so each range length is one
+    # task: it finds the breakouts once and then scores every stop/target
+    # pair over all symbols and days in a handful of array passes.
+    grid = dict(DEFAULT_GRID, **(grid or {}))
+    ranges = grid["range_minutes"]
+    args = (grid["prob_scaler"], grid["rr_ratio"])
+    if workers == 1 or len(ranges) == 1:
+        _init_worker(sessions)
+        chunks = [_sweep_range(range_minutes, *args) for range_minutes in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or min(len(ranges), 8), initializer=_init_worker, initargs=(sessions,)) as pool:
+            chunks = list(pool.map(_sweep_range, ranges, *([arg] * len(ranges) for arg in args)))
+    rows = [row for chunk in chunks for row in chunk]
+    rows.sort(key=lambda row: (row["expectancy"], -row["max_drawdown"]), reverse=True)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Opening-range breakout backtest and parameter sweep over cached 5m bars")
+    parser.add_argument("--symbols", default=",".join(BACKTEST_SYMBOLS))
+    parser.add_argument("--days", type=int, default=BACKTEST_DAYS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.symbols.split(","), args.days)
+    if sessions is None:
+        print("No bars available to backtest")
+    else:
+        started = time.perf_counter()
+        rows = sweep(sessions, workers=args.workers)
+        columns = ["range_minutes", "prob_scaler", "rr_ratio", "trades", "hit_rate", "expectancy", "total_r", "max_drawdown"]
+        print(" | ".join(columns))
+        for row in rows[:args.top]:
+            print(" | ".join(str(row[column]) for column in columns))
+        print(f"{len(rows)} parameter sets over {len(sessions['day'])} sessions in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,192 @@
+import threading
+import time
+import numpy as np
+from bar_store import BAR_DTYPE, empty_bars
+
+# Bar width in seconds and how many bars each ring keeps per symbol. Every
+# width must be a multiple of the first, finest one.
+INTERVALS = {"1s": 1, "1m": 60, "5m": 300}
+CAPACITIES = {"1s": 600, "1m": 1440, "5m": 576}
+
+
+def merge_bar(bar, high, low, close, volume):
+    if high > bar[1]:
+        bar[1] = high
+    if low < bar[2]:
+        bar[2] = low
+    bar[3] = close
+    bar[4] += volume
+
+
+class BarRing:
+    # Fixed-size ring of BAR_DTYPE rows backed by a buffer twice that size:
+    # the upper half mirrors the lower one, so any run of up to `capacity`
+    # most recent bars is one contiguous slice and queries return views
+    # instead of copies. The forming bar lives in plain floats and closed
+    # bars queue in a list; both reach the buffer (allocated on first use) in
+    # one vectorized write when a query needs them, which keeps NumPy out of
+    # the per-tick path.
+    def __init__(self, seconds, capacity):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.buf = None
+        self.count = 0
+        self.written = 0
+        self.closed = []
+        self.bucket = None
+        self.bar = None
+
+    def _flush(self):
+        if self.buf is None:
+            self.buf = np.zeros(2 * self.capacity, dtype=BAR_DTYPE)
+        if self.closed:
+            rows = np.array(self.closed[-self.capacity:], dtype=BAR_DTYPE)
+            first = self.written + len(self.closed) - len(rows)
+            self.buf[np.arange(first, first + len(rows)) % self.capacity] = rows
+            self.written += len(self.closed)
+            self.closed = []
+
+    def update(self, ts, open_price, high, low, close, volume):
+        # Returns the bar this update closed, if any, for rolling up.
+        bucket = ts - ts % self.seconds
+        if self.bucket is None or bucket > self.bucket:
+            closed = None
+            if self.bar is not None:
+                closed = (self.bucket, *self.bar)
+                self.closed.append(closed)
+                if len(self.closed) >= self.capacity:
+                    self._flush()
+            self.bucket = bucket
+            self.count += 1
+            self.bar = [open_price, high, low, close, volume]
+            return closed
+        # Late prints fold into the bar that is still forming.
+        merge_bar(self.bar, high, low, close, volume)
+        return None
+
+    def last(self, n, pending=None):
+        # `pending` is the forming bar of a finer ring that has not rolled up
+        # yet; it is folded into the view without changing the ring's state.
+        self._flush()
+        count, bucket, bar = self.count, self.bucket, self.bar
+        if pending is not None:
+            pending_bucket = pending[0] - pending[0] % self.seconds
+            if bucket is None or pending_bucket > bucket:
+                if bar is not None:
+                    self.buf[(count - 1) % self.capacity] = (bucket, *bar)
+                count, bucket, bar = count + 1, pending_bucket, list(pending[1:])
+            else:
+                bar = list(bar)
+                merge_bar(bar, *pending[2:])
+        if bar is not None:
+            self.buf[(count - 1) % self.capacity] = (bucket, *bar)
+        self.buf[self.capacity:] = self.buf[:self.capacity]
+        n = min(n, count, self.capacity)
+        end = (count - 1) % self.capacity + self.capacity + 1
+        return self.buf[end - n:end]
+
+    def pending(self):
+        return (self.bucket, *self.bar) if self.bar is not None else None
+
+
+class BarAggregator:
+    # Turns stream events into 1s/1m/5m OHLCV bars per symbol. Trades move
+    # price and volume; quotes move price through the mid, so symbols without
+    # prints (indices, VIX) still get bars. Ticks only touch the finest ring;
+    # each closed bar there rolls up into the wider ones. Rings are allocated
+    # on a symbol's first event. Query results are live views into the ring:
+    # copy them if they are kept past the current request. Listeners get
+    # (symbol, bar) for every bar that closes at their interval; they run
+    # under the aggregator lock, so they must not query it back.
+    def __init__(self, intervals=None, capacities=None):
+        self.intervals = intervals or INTERVALS
+        self.capacities = capacities or CAPACITIES
+        self._names = list(self.intervals)
+        self._series = {}
+        self._listeners = [[] for _ in self._names]
+        self._lock = threading.Lock()
+
+    def add_listener(self, interval, callback):
+        self._listeners[self._names.index(interval)].append(callback)
+
+    def _rings(self, symbol):
+        rings = self._series.get(symbol)
+        if rings is None:
+            rings = self._series[symbol] = [BarRing(seconds, self.capacities[name]) for name, seconds in self.intervals.items()]
+        return rings
+
+    def _update(self, symbol, rings, ts, open_price, high, low, close, volume):
+        closed = rings[0].update(ts, open_price, high, low, close, volume)
+        if closed is None:
+            return
+        listeners = self._listeners
+        for callback in listeners[0]:
+            callback(symbol, closed)
+        for index in range(1, len(rings)):
+            rolled = rings[index].update(*closed)
+            if rolled is not None:
+                for callback in listeners[index]:
+                    callback(symbol, rolled)
+
+    def update(self, symbol, open_price, high, low, close, volume=0.0, ts=None):
+        if close != close:
+            return
+        ts = int(ts or time.time())
+        with self._lock:
+            self._update(symbol, self._rings(symbol), ts, open_price, high, low, close, volume)
+
+    def on_trade(self, symbol, price, size=0.0, ts=None):
+        size = size if size == size else 0.0
+        self.update(symbol, price, price, price, price, size, ts)
+
+    def on_quote(self, symbol, bid, ask, ts=None):
+        mid = (bid + ask) / 2
+        self.update(symbol, mid, mid, mid, mid, 0.0, ts)
+
+    def apply(self, symbols, prices, sizes=None, ts=None):
+        # One lock and one timestamp per frame; each event is then a couple of
+        # float compares on the finest ring, which beats grouping with NumPy
+        # when most events in a frame are for different symbols.
+        prices = prices.tolist() if isinstance(prices, np.ndarray) else prices
+        sizes = sizes.tolist() if isinstance(sizes, np.ndarray) else sizes or [0.0] * len(prices)
+        ts = int(ts or time.time())
+        update, series = self._update, self._series
+        with self._lock:
+            for symbol, price, size in zip(symbols, prices, sizes):
+                if price != price:
+                    continue
+                rings = series.get(symbol) or self._rings(symbol)
+                update(symbol, rings, ts, price, price, price, price, size if size == size else 0.0)
+
+    def apply_batch(self, event_type, batch, ts=None):
+        if event_type == "Trade":
+            self.apply(batch["symbols"], batch["price"], batch.get("volume", batch["size"]), ts)
+        elif event_type == "Quote":
+            bids, asks = batch["bidPrice"], batch["askPrice"]
+            mids = (bids + asks) / 2 if batch.get("vectorized") else [(bid + ask) / 2 for bid, ask in zip(bids, asks)]
+            self.apply(batch["symbols"], mids, None, ts)
+
+    def _window(self, symbol, interval, n):
+        rings = self._series.get(symbol)
+        if not rings:
+            return empty_bars()
+        index = self._names.index(interval)
+        return rings[index].last(n, rings[0].pending() if index else None)
+
+    def last(self, symbol, interval="1m", n=1):
+        with self._lock:
+            return self._window(symbol, interval, n)
+
+    def since(self, symbol, interval="1m", ts=0):
+        seconds = self.intervals[interval]
+        with self._lock:
+            window = self._window(symbol, interval, self.capacities[interval])
+        return window[np.searchsorted(window["ts"], int(ts) - int(ts) % seconds):]
+
+    def symbols(self):
+        with self._lock:
+            return list(self._series)
+
+
+def bars_to_json(bars):
+    return [{name: bar[name].item() for name in BAR_DTYPE.names} for bar in bars]
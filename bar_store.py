@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+import numpy as np
+import yfinance as yf
+from datetime import datetime, timezone, timedelta
+
+BAR_DTYPE = np.dtype([("ts", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "f8")])
+# Resolved from this file rather than the working directory, so main.py,
+# webserve and the backtest CLI all share one cache.
+BAR_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bars")
+
+
+def empty_bars():
+    return np.zeros(0, dtype=BAR_DTYPE)
+
+
+def frame_to_bars(hist):
+    if hist is None or hist.empty:
+        return empty_bars(), []
+    bars = np.zeros(len(hist), dtype=BAR_DTYPE)
+    bars["ts"] = [int(ts.timestamp()) for ts in hist.index]
+    for column in ("open", "high", "low", "close", "volume"):
+        bars[column] = hist[column.capitalize()].to_numpy(dtype=float)
+    return bars, list(hist.index.date)
+
+
+def yfinance_bars(symbol, interval, start, end):
+    hist = yf.Ticker(symbol).history(start=start.strftime('%Y-%m-%d'), end=(end + timedelta(days=1)).strftime('%Y-%m-%d'), interval=interval)
+    return frame_to_bars(hist)
+
+
+class BarStore:
+    # One .npy file per (symbol, interval, session date) under BAR_ROOT. Only
+    # completed days are persisted, and a completed day with no bars (weekend,
+    # holiday) is stored as an empty file so it is never requested again.
+    def __init__(self, root=BAR_ROOT, fetcher=yfinance_bars):
+        self.root = root
+        self.fetcher = fetcher
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9_.-]", "_", symbol), interval)
+
+    def path(self, symbol, interval, day):
+        return os.path.join(self._dir(symbol, interval), f"{day.isoformat()}.npy")
+
+    def has(self, symbol, interval, day):
+        return os.path.exists(self.path(symbol, interval, day))
+
+    def missing_ranges(self, symbol, interval, start, end):
+        ranges = []
+        day = start
+        while day <= end:
+            if not self.has(symbol, interval, day):
+                if ranges and ranges[-1][1] == day - timedelta(days=1):
+                    ranges[-1] = (ranges[-1][0], day)
+                else:
+                    ranges.append((day, day))
+            day += timedelta(days=1)
+        return ranges
+
+    def write_day(self, symbol, interval, day, bars):
+        path = self.path(symbol, interval, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(bars, dtype=BAR_DTYPE))
+        os.replace(tmp, path)
+
+    def read(self, symbol, interval, start, end):
+        chunks = []
+        day = start
+        while day <= end:
+            path = self.path(symbol, interval, day)
+            if os.path.exists(path):
+                bars = np.load(path, mmap_mode="r")
+                if len(bars):
+                    chunks.append(bars)
+            day += timedelta(days=1)
+        return np.concatenate(chunks) if chunks else empty_bars()
+
+    def ensure(self, symbol, interval, start, end):
+        # Clamp to yesterday: today's session is still open and never cached.
+        end = min(end, datetime.now(timezone.utc).date() - timedelta(days=1))
+        if start > end:
+            return empty_bars()
+        with self._lock(symbol, interval):
+            for range_start, range_end in self.missing_ranges(symbol, interval, start, end):
+                try:
+                    bars, days = self.fetcher(symbol, interval, range_start, range_end)
+                except Exception as e:
+                    print(f"Failed to fetch {interval} bars for {symbol} {range_start}..{range_end}: {e}")
+                    continue
+                if not len(bars) and any((range_start + timedelta(days=i)).weekday() < 5 for i in range((range_end - range_start).days + 1)):
+                    # An empty answer for a range with weekdays is more likely a
+                    # source hiccup than a holiday run; retry next time.
+                    continue
+                by_day = {}
+                for i, day in enumerate(days):
+                    by_day.setdefault(day, []).append(i)
+                day = range_start
+                while day <= range_end:
+                    self.write_day(symbol, interval, day, bars[by_day.get(day, [])])
+                    day += timedelta(days=1)
+                print(f"Cached {len(bars)} {interval} bars for {symbol} {range_start}..{range_end}")
+        return self.read(symbol, interval, start, end)
+
+    def average_volume(self, symbol, days=5):
+        end = datetime.now(timezone.utc).date() - timedelta(days=1)
+        bars = self.ensure(symbol, "1d", end - timedelta(days=days - 1), end)
+        volumes = bars["volume"][bars["volume"] > 0]
+        return float(volumes.mean()) if len(volumes) else None
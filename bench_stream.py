@@ -0,0 +1,154 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import main
+from bar_aggregator import BarAggregator
+from market_state import MarketStateStore
+from metrics import MetricsEngine
+from publisher import IndicatorPublisher
+from replay import FakeSocketIO, ReplayWS
+from rvol_curve import VolumeCurves
+from technicals import TechnicalsEngine
+from volume_profile import VolumeProfileBook
+
+# Event mix per burst profile: (Trade, Quote, Summary) weights and how skewed
+# traffic is towards a few hot symbols (0 = uniform).
+PROFILES = {
+    "steady": ((0.35, 0.60, 0.05), 0.0),
+    "open_burst": ((0.70, 0.29, 0.01), 1.2),
+    "summary_storm": ((0.20, 0.30, 0.50), 0.0),
+}
+
+
+def synthetic_symbols(count):
+    base = list(main.DEFAULT_INDICATORS.keys())
+    return (base + [f"SYM{i}" for i in range(count)])[:count]
+
+
+def synthetic_events(symbols, count, profile="steady", seed=7, per_frame=1):
+    # Pre-encoded FEED_DATA frames in the COMPACT field order the stream shards
+    # negotiate: Trade [type, symbol, price, size, dayVolume], Quote [type,
+    # symbol, bid, ask], Summary [type, symbol, dayOpenPrice].
+    (weights, skew) = PROFILES[profile]
+    rng = random.Random(seed)
+    symbol_weights = [1 / (i + 1) ** skew for i in range(len(symbols))]
+    prices = {symbol: rng.uniform(10, 600) for symbol in symbols}
+    day_volumes = dict.fromkeys(symbols, 0)
+    picks = rng.choices(symbols, weights=symbol_weights, k=count)
+    kinds = rng.choices(("Trade", "Quote", "Summary"), weights=weights, k=count)
+    groups = []
+    for symbol, kind in zip(picks, kinds):
+        price = prices[symbol] = max(0.01, prices[symbol] * (1 + rng.gauss(0, 0.0005)))
+        if kind == "Trade":
+            size = rng.randint(1, 500)
+            day_volumes[symbol] += size
+            event = ["Trade", symbol, round(price, 2), size, day_volumes[symbol]]
+        elif kind == "Quote":
+            spread = max(0.01, price * 0.0002)
+            event = ["Quote", symbol, round(price - spread, 2), round(price + spread, 2)]
+        else:
+            event = ["Summary", symbol, round(price, 2) if rng.random() > 0.1 else "NaN"]
+        groups.append((kind, event))
+    # per_frame > 1 packs consecutive events into one aggregated COMPACT frame,
+    # the way DXLink batches them under acceptAggregationPeriod.
+    frames = []
+    for start in range(0, len(groups), per_frame):
+        by_kind = {}
+        for kind, event in groups[start:start + per_frame]:
+            by_kind.setdefault(kind, []).extend(event)
+        data = [part for kind, values in by_kind.items() for part in (kind, values)]
+        frames.append(json.dumps({"type": "FEED_DATA", "channel": 1, "data": data}))
+    return frames
+
+
+def install_fresh_state(symbols, interval):
+    # Every object on main.on_message's path is rebuilt and wired as main.py
+    # wires it, so no run inherits bars, profiles or indicator state.
+    fake = FakeSocketIO()
+    store = MarketStateStore(symbols)
+    profiles = VolumeProfileBook()
+    curves = VolumeCurves()
+    bar_aggregator = BarAggregator()
+    technicals = TechnicalsEngine()
+    bar_aggregator.add_listener(main.TECHNICALS_INTERVAL, technicals.on_bar)
+    engine = MetricsEngine(store, {symbol: {"sentiment": "positive"} for symbol in symbols}, profiles=profiles, curves=curves)
+    for symbol in symbols:
+        store.set(symbol, "avg_volume", 1000000)
+        curves.set(store.slot(symbol), None)
+    main.socketio = fake
+    main.market_store = store
+    main.volume_profiles = profiles
+    main.bar_aggregator = bar_aggregator
+    main.technicals = technicals
+    main.metrics_engine = engine
+    main.publisher = IndicatorPublisher(fake, interval=interval, stats_every=0)
+    return fake
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def run(symbol_count, events, profile, interval=0.1, alloc_sample=2000, per_frame=1):
+    symbols = synthetic_symbols(symbol_count)
+    frames = synthetic_events(symbols, events, profile, per_frame=per_frame)
+    fake = install_fresh_state(symbols, interval)
+    ws = ReplayWS()
+    handler = main.on_message
+    latencies = []
+    main.publisher.start()
+    clock = time.perf_counter_ns
+    start = clock()
+    for frame in frames:
+        t0 = clock()
+        handler(ws, frame)
+        latencies.append(clock() - t0)
+    elapsed = (clock() - start) / 1e9
+    main.publisher.stop()
+    publisher_stats = main.publisher.snapshot_stats()
+
+    tracemalloc.start()
+    allocated = 0
+    sample = frames[:max(1, alloc_sample // per_frame)]
+    for frame in sample:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        handler(ws, frame)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "symbols": symbol_count,
+        "profile": profile,
+        "events": events,
+        "events_per_s": round(events / elapsed),
+        "per_frame": per_frame,
+        "p50_us": round(percentile(latencies, 50) / 1000, 1),
+        "p99_us": round(percentile(latencies, 99) / 1000, 1),
+        "alloc_bytes_per_event": round(allocated / max(len(sample) * per_frame, 1)),
+        "socketio_frames": fake.frames,
+        "socketio_rows": fake.rows,
+        "coalesced": publisher_stats["coalesced"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark for the DXLink -> Socket.IO hot path")
+    parser.add_argument("--symbols", default="13,100,1000")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--per-frame", type=int, default=1, help="events packed into each COMPACT frame")
+    args = parser.parse_args()
+
+    columns = ["symbols", "profile", "events", "per_frame", "events_per_s", "p50_us", "p99_us", "alloc_bytes_per_event", "socketio_frames", "socketio_rows", "coalesced"]
+    print(" | ".join(columns))
+    for count in [int(c) for c in args.symbols.split(",")]:
+        for profile in args.profiles.split(","):
+            result = run(count, args.events, profile, args.interval, per_frame=args.per_frame)
+            print(" | ".join(str(result[c]) for c in columns))
@@ -0,0 +1,149 @@
+import bisect
+import threading
+import time
+import numpy as np
+
+# How long quote mids must stay past a level before a symbol without prints
+# fires; a single quote flickering across it does not.
+QUOTE_CONFIRM_SECONDS = 2.0
+
+
+class TriggerBook:
+    # Armed thresholds for one symbol in two sorted lists. "above" triggers
+    # fire once price trades above their level, "below" ones once it trades
+    # below. A tick that fires nothing costs one compare per side against the
+    # nearest level; firing bisects off every crossed level at once.
+    __slots__ = ("upper", "upper_triggers", "lower", "lower_triggers")
+
+    def __init__(self, triggers=()):
+        self.upper, self.upper_triggers = [], []
+        self.lower, self.lower_triggers = [], []
+        for trigger in triggers:
+            self.add(trigger)
+
+    def add(self, trigger):
+        level = float(trigger["level"])
+        if trigger["direction"] == "above":
+            index = bisect.bisect_right(self.upper, level)
+            self.upper.insert(index, level)
+            self.upper_triggers.insert(index, trigger)
+        else:
+            index = bisect.bisect_left(self.lower, level)
+            self.lower.insert(index, level)
+            self.lower_triggers.insert(index, trigger)
+
+    def check(self, price):
+        fired = []
+        upper, lower = self.upper, self.lower
+        if upper and price > upper[0]:
+            index = bisect.bisect_left(upper, price)
+            fired.extend(self.upper_triggers[:index])
+            del upper[:index], self.upper_triggers[:index]
+        if lower and price < lower[-1]:
+            index = bisect.bisect_right(lower, price)
+            fired.extend(self.lower_triggers[index:])
+            del lower[index:], self.lower_triggers[index:]
+        return fired
+
+    def crosses(self, price):
+        return bool(self.upper and price > self.upper[0] or self.lower and price < self.lower[-1])
+
+    def armed(self):
+        return self.upper_triggers + self.lower_triggers
+
+
+class TriggerEngine:
+    # Per-symbol TriggerBooks checked on every print. Triggers are one-shot:
+    # once fired they are gone until levels are set again. on_fire runs on
+    # the calling (stream) thread after the lock is released, so it should
+    # hand slow work such as email off to another thread. Symbols that never
+    # print (indices, VIX) are driven by quote mids instead; a crossing mid
+    # only fires once mids have stayed past the level for quote_confirm
+    # seconds. A symbol's first trade switches it to prints for good.
+    def __init__(self, on_fire, quote_confirm=QUOTE_CONFIRM_SECONDS):
+        self.on_fire = on_fire
+        self.quote_confirm = quote_confirm
+        self._books = {}
+        self._last = {}
+        self._printing = set()
+        self._crossed_at = {}
+        self._lock = threading.Lock()
+        self.stats = {"ticks": 0, "quotes": 0, "fired": 0}
+
+    def set_triggers(self, symbol, triggers):
+        with self._lock:
+            self._books[symbol] = TriggerBook(triggers)
+            self._crossed_at.pop(symbol, None)
+
+    def disarm(self, symbol):
+        with self._lock:
+            self._books.pop(symbol, None)
+            self._crossed_at.pop(symbol, None)
+
+    def clear(self):
+        with self._lock:
+            self._books = {}
+            self._crossed_at = {}
+
+    def on_tick(self, symbol, price):
+        self.on_ticks((symbol,), (price,))
+
+    def on_ticks(self, symbols, prices):
+        prices = prices.tolist() if isinstance(prices, np.ndarray) else prices
+        fired = []
+        books, last, printing = self._books, self._last, self._printing
+        with self._lock:
+            for symbol, price in zip(symbols, prices):
+                if price != price:
+                    continue
+                last[symbol] = price
+                printing.add(symbol)
+                book = books.get(symbol)
+                if book is not None:
+                    for trigger in book.check(price):
+                        fired.append((symbol, trigger, price))
+            self.stats["ticks"] += len(prices)
+            self.stats["fired"] += len(fired)
+        self._fire(fired)
+
+    def on_quotes(self, symbols, bids, asks, ts=None):
+        bids = bids.tolist() if isinstance(bids, np.ndarray) else bids
+        asks = asks.tolist() if isinstance(asks, np.ndarray) else asks
+        now = ts or time.time()
+        fired = []
+        books, last, printing, crossed_at = self._books, self._last, self._printing, self._crossed_at
+        with self._lock:
+            for symbol, bid, ask in zip(symbols, bids, asks):
+                mid = (bid + ask) / 2
+                if symbol in printing or mid != mid:
+                    continue
+                last[symbol] = mid
+                book = books.get(symbol)
+                if book is None or not book.crosses(mid):
+                    crossed_at.pop(symbol, None)
+                    continue
+                if now - crossed_at.setdefault(symbol, now) >= self.quote_confirm:
+                    del crossed_at[symbol]
+                    for trigger in book.check(mid):
+                        fired.append((symbol, trigger, mid))
+            self.stats["quotes"] += len(bids)
+            self.stats["fired"] += len(fired)
+        self._fire(fired)
+
+    def _fire(self, fired):
+        for symbol, trigger, price in fired:
+            self.on_fire(symbol, trigger, price)
+
+    def apply_batch(self, event_type, batch, ts=None):
+        if event_type == "Trade":
+            self.on_ticks(batch["symbols"], batch["price"])
+        elif event_type == "Quote":
+            self.on_quotes(batch["symbols"], batch["bidPrice"], batch["askPrice"], ts)
+
+    def last_price(self, symbol):
+        return self._last.get(symbol)
+
+    def armed(self):
+        with self._lock:
+            return {symbol: [(trigger["direction"], trigger["level"]) for trigger in book.armed()]
+                    for symbol, book in self._books.items()}
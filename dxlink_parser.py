@@ -0,0 +1,84 @@
+import json
+import numpy as np
+
+try:
+    import orjson
+
+    def loads(message):
+        return orjson.loads(message)
+except ImportError:
+    loads = json.loads
+
+# Below this many events per group NumPy's per-call overhead outweighs the
+# vectorized work, so small groups are decoded to plain float lists instead.
+VECTOR_MIN_EVENTS = 16
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def to_float_array(values):
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        out = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def group_symbols(symbols, mask=None):
+    # Distinct symbols in first-seen order plus each event's group index; a
+    # dict pass is far cheaper than np.unique over a string array.
+    index = {}
+    if mask is not None:
+        symbols = [symbol for symbol, keep in zip(symbols, mask.tolist()) if keep]
+    inverse = np.fromiter((index.setdefault(symbol, len(index)) for symbol in symbols), dtype=np.intp, count=len(symbols))
+    return list(index), inverse
+
+
+class CompactParser:
+    # Decodes COMPACT FEED_DATA payloads for the field layouts negotiated in
+    # FEED_SETUP. A payload is [type, [flattened values], type, [...], ...];
+    # each group is cut into columns with strided slices in one pass, so a frame
+    # carrying hundreds of aggregated events costs a handful of list slices.
+    def __init__(self, event_fields):
+        self.layouts = {}
+        for event_type, fields in event_fields.items():
+            self.layouts[event_type] = (len(fields), fields.index("eventSymbol"),
+                                        [(i, name) for i, name in enumerate(fields) if name not in ("eventType", "eventSymbol")])
+
+    def parse(self, payload):
+        batches = []
+        if not isinstance(payload, list):
+            return batches
+        for i in range(0, len(payload) - 1, 2):
+            event_type, values = payload[i], payload[i + 1]
+            layout = self.layouts.get(event_type)
+            if layout is None or not isinstance(values, list):
+                continue
+            width, symbol_index, numeric = layout
+            count = len(values) // width
+            if not count:
+                continue
+            end = count * width
+            vectorized = count >= VECTOR_MIN_EVENTS
+            batch = {"symbols": values[symbol_index:end:width], "count": count, "vectorized": vectorized}
+            for index, name in numeric:
+                column = values[index:end:width]
+                batch[name] = to_float_array(column) if vectorized else [to_float(v) for v in column]
+            batches.append((event_type, batch))
+        return batches
+
+    def parse_message(self, message):
+        data = loads(message)
+        if data.get("type") != "FEED_DATA":
+            return []
+        return self.parse(data.get("data"))
@@ -0,0 +1,115 @@
+import threading
+import time
+import pandas as pd
+import pandas_datareader.data as web
+import http_client
+from datetime import datetime, timezone, timedelta
+
+# FRED refresh intervals per series, roughly matched to how often each one
+# publishes. Everything in CHAOS_EVENTS is monthly, but the market-moving
+# releases are checked more often so a same-day print shows up quickly.
+SERIES_TTLS = {
+    "PAYEMS": 900,
+    "CPIAUCSL": 900,
+    "FEDFUNDS": 1800,
+    "UNRATE": 900,
+    "RSXFS": 1800,
+    "LBUCONF": 3600,
+    "HOUST": 3600,
+    "INDPRO": 3600,
+}
+DEFAULT_TTL = 3600
+INITIAL_LOOKBACK_DAYS = 120
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+def impact_color(impact):
+    return "lightred" if impact == "high" else "lightorange" if impact == "medium" else "paleyellow"
+
+
+class EconomicEventCache:
+    # Filled by fred_thread, read by /indicator. Observations are kept per series
+    # and only newer ones are requested; the published event list is swapped in
+    # as a whole so readers never see a half-built list.
+    def __init__(self, series, ttls=None, reader=None):
+        self.series = series
+        self.ttls = ttls or SERIES_TTLS
+        self.reader = reader or (lambda code, start, end: web.DataReader(code, "fred", start, end, session=http_client.get_session()))
+        self._observations = {code: pd.Series(dtype=float) for code in series}
+        self._fetched_at = {}
+        self._refresh_lock = threading.Lock()
+        self._events = ()
+
+    def snapshot(self):
+        events = self._events
+        return list(events), self._pick_latest(events)
+
+    def _due(self, code, now):
+        return now - self._fetched_at.get(code, 0) >= self.ttls.get(code, DEFAULT_TTL)
+
+    def _fetch(self, code):
+        stored = self._observations[code]
+        end = datetime.now(timezone.utc)
+        if stored.empty:
+            start = end - timedelta(days=INITIAL_LOOKBACK_DAYS)
+        else:
+            start = stored.index[-1].to_pydatetime() + timedelta(days=1)
+            if start.date() > end.date():
+                return 0
+        data = self.reader(code, start, end)
+        if data is None or data.empty:
+            return 0
+        fresh = data[code].dropna()
+        fresh = fresh[~fresh.index.isin(stored.index)]
+        if fresh.empty:
+            return 0
+        self._observations[code] = pd.concat([stored, fresh]).sort_index()
+        return len(fresh)
+
+    def refresh(self, upcoming_events=(), force=False):
+        with self._refresh_lock:
+            now = time.time()
+            due = [code for code in self.series if force or self._due(code, now)]
+            for code, added in http_client.fan_out(self._fetch, due).items():
+                if added is None:
+                    continue
+                self._fetched_at[code] = now
+                if added:
+                    print(f"FRED {self.series[code][0]}: {added} new observation(s)")
+            old_events = self._events
+            self._events = self._build_events(upcoming_events)
+            return [event for event in self._events if event not in old_events]
+
+    def _build_events(self, upcoming_events):
+        today = datetime.now(timezone.utc).date()
+        events = []
+        for code, (title, impact) in self.series.items():
+            observations = self._observations[code]
+            if observations.empty:
+                continue
+            event_time = observations.index[-1].to_pydatetime().replace(tzinfo=timezone.utc)
+            if event_time.date() != today:
+                continue
+            event = {
+                "title": title,
+                "time": event_time.strftime(TIME_FORMAT),
+                "impact": impact,
+                "actual": float(observations.iloc[-1]),
+                "forecast": "N/A",
+                "previous": float(observations.iloc[-2]) if len(observations) > 1 else "N/A",
+                "color": impact_color(impact)
+            }
+            for upcoming in upcoming_events:
+                if upcoming["title"] == title and abs((datetime.strptime(upcoming["time"], TIME_FORMAT) - event_time).total_seconds()) < 3600:
+                    event["forecast"] = upcoming.get("forecast", "N/A")
+            events.append(event)
+        events.sort(key=lambda x: x["time"])
+        return tuple(events)
+
+    @staticmethod
+    def _pick_latest(events):
+        now = datetime.now(timezone.utc)
+        return next(
+            (e for e in reversed(events) if datetime.strptime(e["time"], TIME_FORMAT) <= now),
+            events[-1] if events else None
+        )
@@ -0,0 +1,77 @@
+import threading
+import certifi
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (5, 20)
+POOL_SIZE = 16
+MAX_WORKERS = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_size=POOL_SIZE, retries=3, backoff=0.5):
+    # One Session keeps a keep-alive pool per host, so every tastytrade, FRED,
+    # NewsAPI and Forex Factory call after the first skips the TCP+TLS setup.
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = certifi.where()
+    session.headers.update({"User-Agent": "grok-client/1.0"})
+    return session
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def request(method, url, **kwargs):
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="http")
+
+
+def submit(func, *args, **kwargs):
+    return _executor.submit(func, *args, **kwargs)
+
+
+def fan_out(func, items, *args, **kwargs):
+    # Runs func(item, *args, **kwargs) for every item on the shared pool and
+    # returns {item: result}; a failing item maps to None.
+    futures = {_executor.submit(func, item, *args, **kwargs): item for item in items}
+    results = {}
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            results[item] = future.result()
+        except Exception as e:
+            print(f"Parallel fetch failed for {item}: {e}")
+            results[item] = None
+    return results
@@ -1,37 +1,59 @@
 print("Starting Grok Sauce Streaming Machine...")
 
 import requests
-import websocket as websocket
+import http_client
 import json
+import math
 import threading
 import time
-import certifi
 import os
-import yfinance as yf
-import pandas_datareader.data as web
-import pandas as pd
-from flask import Flask, render_template, request, redirect, url_for
+import numpy as np
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 from flask_socketio import SocketIO, emit
-from collections import defaultdict
 from dotenv import load_dotenv
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from datetime import datetime, timezone, timedelta
+from publisher import IndicatorPublisher
+from market_state import MarketStateStore
+from metrics import MetricsEngine
+from fred_cache import EconomicEventCache
+from bar_store import BarStore
+from recorder import TickRecorder
+from stream_manager import StreamManager, EVENT_FIELDS
+from dxlink_parser import CompactParser
+from runtime import AppState, Runtime
+from sentiment import SentimentService
+from news_cache import QueryCache, normalize_query
+from max_pain import MaxPainEngine
+from volume_profile import VolumeProfileBook
+from rvol_curve import curve_from_bars
+from bar_aggregator import BarAggregator, CAPACITIES, INTERVALS, bars_to_json
+from technicals import TechnicalsEngine
 
 load_dotenv()
 
 app = Flask(__name__)
 socketio = SocketIO(app)
 
-market_data = defaultdict(lambda: {"price": 0, "volume": 0, "open": 0, "last_update": 0, "avg_volume": 0})
-news_feed = []
-forex_events = []
-upcoming_events = []
-master_sentiment = 0
-pain_points = {}
+market_store = MarketStateStore()
+bar_store = BarStore()
+app_state = AppState(news_feed=(), master_sentiment=0, upcoming_events=(), pain_points={})
 
-streamer_thread = None
+stream_manager = None
 streamer_symbols = []
 session_token = None
+session_expires_at = 0
+quote_token_cache = {"token": None, "expires_at": 0}
+QUOTE_TOKEN_TTL = 20 * 3600
+SESSION_TTL = 20 * 3600
+NEWS_SEARCH_TTL = 15 * 60
+PAIN_EXPIRATIONS = 3
+PROFILE_LEVELS_INTERVAL = 5
+# Calendar days of 5m bars averaged into each symbol's intraday volume curve.
+VOLUME_CURVE_DAYS = 14
+# Technicals run on 1m bars; yfinance only serves 1m history for the last week.
+TECHNICALS_INTERVAL = "1m"
+TECHNICALS_DAYS = 5
+SESSION_RESET_HOUR = 8
 
 SETTINGS_FILE = "settings.json"
 DAILY_FILE = "daily.json"
@@ -52,7 +74,10 @@ DEFAULT_INDICATORS = {
 }
 DEFAULT_SETTINGS = {
     "indicators": DEFAULT_INDICATORS,
-    "enable_forex_factory": False
+    "enable_forex_factory": False,
+    "emit_interval": 0.1,
+    "record_ticks": False,
+    "stream_shard_size": 50
 }
 
 if os.path.exists(SETTINGS_FILE):
@@ -61,18 +86,43 @@ if os.path.exists(SETTINGS_FILE):
             settings = json.load(f)
         INDICATORS = settings.get("indicators", DEFAULT_INDICATORS)
         ENABLE_FOREX_FACTORY = settings.get("enable_forex_factory", False)
+        EMIT_INTERVAL = settings.get("emit_interval", 0.1)
+        RECORD_TICKS = settings.get("record_ticks", False)
+        STREAM_SHARD_SIZE = settings.get("stream_shard_size", 50)
         print(f"Loaded settings from {SETTINGS_FILE}: {settings}")
     except (json.JSONDecodeError, IOError) as e:
         print(f"Failed to load {SETTINGS_FILE}: {e}, using defaults")
         INDICATORS = DEFAULT_INDICATORS
         ENABLE_FOREX_FACTORY = False
+        EMIT_INTERVAL = 0.1
+        RECORD_TICKS = False
+        STREAM_SHARD_SIZE = 50
 else:
     INDICATORS = DEFAULT_INDICATORS
     ENABLE_FOREX_FACTORY = False
+    EMIT_INTERVAL = 0.1
+    RECORD_TICKS = False
+    STREAM_SHARD_SIZE = 50
     with open(SETTINGS_FILE, 'w') as f:
         json.dump(DEFAULT_SETTINGS, f)
     print(f"Initialized settings to default in {SETTINGS_FILE}")
 
+# The DXLink aggregation period and the Socket.IO flush tick share one value so
+# each flush carries roughly one aggregated batch from the feed.
+EMIT_INTERVAL = min(max(float(EMIT_INTERVAL), 0.1), 0.25)
+publisher = IndicatorPublisher(socketio, interval=EMIT_INTERVAL)
+volume_profiles = VolumeProfileBook()
+bar_aggregator = BarAggregator()
+technicals = TechnicalsEngine()
+bar_aggregator.add_listener(TECHNICALS_INTERVAL, technicals.on_bar)
+metrics_engine = MetricsEngine(market_store, INDICATORS, profiles=volume_profiles)
+tick_recorder = TickRecorder() if RECORD_TICKS else None
+feed_parser = CompactParser(EVENT_FIELDS)
+sentiment_service = SentimentService()
+news_search_cache = QueryCache(ttl=NEWS_SEARCH_TTL)
+max_pain_engine = MaxPainEngine(lambda symbol, expiration: fetch_option_chain(symbol, expiration),
+                                lambda symbol: fetch_option_expirations(symbol))
+
 CHAOS_EVENTS = {
     "LBUCONF": ("Consumer Confidence", "high"),
     "FEDFUNDS": ("FOMC Rate Decision", "high"),
@@ -83,41 +133,75 @@ CHAOS_EVENTS = {
     "HOUST": ("Housing Starts", "low"),
     "INDPRO": ("Industrial Production", "low")
 }
+fred_cache = EconomicEventCache(CHAOS_EVENTS)
+
+def parse_expiry(value, default_ttl):
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - 300
+        except ValueError:
+            pass
+    return time.time() + default_ttl
+
+def fetch_quote_token(active_session_token):
+    quote_token_url = "https://api.tastytrade.com/api-quote-tokens"
+    headers = {"Content-Type": "application/json", "Authorization": active_session_token}
+    quote_response = http_client.get(quote_token_url, headers=headers)
+    quote_response.raise_for_status()
+    quote_data = quote_response.json()["data"]
+    api_quote_token = quote_data["token"]
+    quote_token_cache.update({"token": api_quote_token, "expires_at": parse_expiry(quote_data.get("expires-at"), QUOTE_TOKEN_TTL)})
+    print("API quote token acquired.")
+    return api_quote_token
 
 def login_and_get_quote_token(username, password, input_session_token=None, remember_token=None):
-    global session_token
+    global session_token, session_expires_at
+    if session_token and time.time() < session_expires_at:
+        try:
+            return fetch_quote_token(session_token)
+        except requests.exceptions.RequestException as e:
+            print(f"Cached session rejected, logging in again: {e}")
+    
     login_url = "https://api.tastytrade.com/sessions"
     payload = {"login": username, "password": password}
     headers = {"Content-Type": "application/json", "User-Agent": "grok-client/1.0"}
     
     try:
-        response = requests.post(login_url, json=payload, headers=headers, verify=certifi.where())
+        response = http_client.post(login_url, json=payload, headers=headers)
         response.raise_for_status()
         session_data = response.json()["data"]
         session_token = session_data["session-token"]
+        session_expires_at = parse_expiry(session_data.get("session-expiration"), SESSION_TTL)
         print("Logged in successfully. Session token acquired.")
-        
-        quote_token_url = "https://api.tastytrade.com/api-quote-tokens"
-        headers["Authorization"] = session_token
-        quote_response = requests.get(quote_token_url, headers=headers, verify=certifi.where())
-        quote_response.raise_for_status()
-        api_quote_token = quote_response.json()["data"]["token"]
-        print("API quote token acquired.")
-        return api_quote_token
+        return fetch_quote_token(session_token)
     except requests.exceptions.RequestException as e:
         print(f"Failed to log in or get quote token: {e}")
         return None
 
+def get_quote_token(force=False):
+    if not force and quote_token_cache["token"] and time.time() < quote_token_cache["expires_at"]:
+        return quote_token_cache["token"]
+    return login_and_get_quote_token(
+        os.getenv("TASTY_USERNAME"),
+        os.getenv("TASTY_PASSWORD"),
+        os.getenv("TASTY_SESSION_TOKEN"),
+        os.getenv("TASTY_REMEMBER_TOKEN")
+    )
+
 def fetch_historical_volume(symbol, session_token, days=5):
+    avg_volume = bar_store.average_volume(symbol, days)
+    if avg_volume:
+        print(f"Avg volume for {symbol} (bar cache): {avg_volume}")
+        return avg_volume
+    
     end_date = datetime.now(timezone.utc).date()
     start_date = end_date - timedelta(days=days)
     url = f"https://api.tastytrade.com/market-metrics/historic?symbols={symbol}&start-date={start_date.strftime('%Y-%m-%d')}&end-date={end_date.strftime('%Y-%m-%d')}"
     headers = {"Authorization": session_token, "Content-Type": "application/json"}
     try:
-        response = requests.get(url, headers=headers, verify=certifi.where())
+        response = http_client.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
-        print(f"Raw response for {symbol} (tastytrade): {json.dumps(data)}")
         if "data" in data and "items" in data["data"] and data["data"]["items"]:
             total_volume = sum(float(day["volume"]) for day in data["data"]["items"])
             avg_volume = total_volume / len(data["data"]["items"])
@@ -126,17 +210,6 @@ def fetch_historical_volume(symbol, session_token, days=5):
         print(f"No historical data for {symbol} from tastytrade")
     except (requests.exceptions.RequestException, KeyError, ValueError) as e:
         print(f"Failed to fetch historical volume for {symbol} (tastytrade): {e}")
-
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
-        if not hist.empty and "Volume" in hist:
-            avg_volume = hist["Volume"].mean()
-            print(f"Fetched avg volume for {symbol} (yfinance): {avg_volume}")
-            return avg_volume if avg_volume > 0 else 1000000
-        print(f"No historical data for {symbol} from yfinance")
-    except Exception as e:
-        print(f"Failed to fetch historical volume for {symbol} (yfinance): {e}")
     
     if os.path.exists(DAILY_FILE):
         with open(DAILY_FILE, 'r') as f:
@@ -147,101 +220,93 @@ def fetch_historical_volume(symbol, session_token, days=5):
             return avg_volume
     return 1000000
 
-def fetch_volume_profile(symbol, days=7):
-    end_date = datetime.now(timezone.utc).date()
-    start_date = end_date - timedelta(days=days)
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), interval="1h")
-        if not hist.empty:
-            hist["PriceBin"] = hist["Close"].round(0)
-            profile = hist.groupby("PriceBin")["Volume"].sum().to_dict()
-            print(f"Volume Profile for {symbol}: {profile}")
-            return profile
-        print(f"No volume profile data for {symbol} from yfinance")
-        return {}
-    except Exception as e:
-        print(f"Failed to fetch volume profile for {symbol}: {e}")
-        return {}
+def fetch_all_historical_volume(symbols, session_token, days=5):
+    return http_client.fan_out(fetch_historical_volume, symbols, session_token, days)
 
-def fetch_pain_point(symbol, session_token):
-    expiration = (datetime.now(timezone.utc) + timedelta(days=3)).strftime('%Y-%m-%d')
+def fetch_volume_curve(symbol, days=VOLUME_CURVE_DAYS):
+    end_date = datetime.now(timezone.utc).date() - timedelta(days=1)
+    bars = bar_store.ensure(symbol, "5m", end_date - timedelta(days=days - 1), end_date)
+    shape = curve_from_bars(bars)
+    metrics_engine.set_volume_curve(symbol, shape)
+    if shape is None:
+        print(f"No intraday volume curve for {symbol}, using an even pace")
+    else:
+        print(f"Volume curve for {symbol}: {shape[29] * 100:.1f}% by 10:00, {shape[209] * 100:.1f}% by 13:00")
+    return shape
+
+def refresh_volume_curves():
+    http_client.fan_out(fetch_volume_curve, list(INDICATORS.keys()))
+
+def session_start():
+    now = datetime.now(timezone.utc)
+    start = now.replace(hour=SESSION_RESET_HOUR, minute=0, second=0, microsecond=0)
+    return (start if start <= now else start - timedelta(days=1)).timestamp()
+
+def fetch_technicals(symbol, days=TECHNICALS_DAYS):
+    # Cached history up to yesterday plus whatever the aggregator has built
+    # since startup, so a late warm-up doesn't lose today's bars.
+    end_date = datetime.now(timezone.utc).date() - timedelta(days=1)
+    history = bar_store.ensure(symbol, TECHNICALS_INTERVAL, end_date - timedelta(days=days - 1), end_date)
+    # The last aggregator bar is still forming and reaches the engine when it closes.
+    live = bar_aggregator.since(symbol, TECHNICALS_INTERVAL, 0)[:-1].copy()
+    if len(history) and len(live):
+        history = history[history["ts"] < live["ts"][0]]
+    technicals.backfill(symbol, np.concatenate((history, live)), session_start())
+    snapshot = technicals.snapshot(symbol)
+    if snapshot:
+        print(f"Technicals for {symbol}: RSI={snapshot['rsi']}, EMA trend={snapshot['trend']}, from {len(history) + len(live)} bars")
+    return snapshot
+
+def warm_symbols(symbols):
+    for symbol, avg_volume in fetch_all_historical_volume(symbols, session_token).items():
+        metrics_engine.set_avg_volume(symbol, avg_volume or 0)
+    http_client.fan_out(fetch_volume_curve, symbols)
+    http_client.fan_out(fetch_technicals, symbols)
+
+def tastytrade_headers():
+    return {"Authorization": session_token, "Content-Type": "application/json"}
+
+def fetch_option_expirations(symbol):
+    url = f"https://api.tastytrade.com/option-chains/{symbol}/nested"
+    response = http_client.get(url, headers=tastytrade_headers())
+    response.raise_for_status()
+    return [expiration["expiration-date"] for chain in response.json()["data"]["items"] for expiration in chain["expirations"]]
+
+def fetch_option_chain(symbol, expiration):
     url = f"https://api.tastytrade.com/instruments/equity-options?symbol={symbol}&expiration-date={expiration}"
-    headers = {"Authorization": session_token, "Content-Type": "application/json"}
+    response = http_client.get(url, headers=tastytrade_headers())
+    response.raise_for_status()
+    return response.json()["data"]["items"]
+
+def fetch_pain_point(symbol):
     try:
-        response = requests.get(url, headers=headers, verify=certifi.where())
-        response.raise_for_status()
-        options = response.json()["data"]["items"]
-        strike_oi = defaultdict(float)
-        for option in options:
-            strike = float(option["strike-price"])
-            oi = float(option.get("open-interest", 0))
-            strike_oi[strike] += oi
-        
-        today = datetime.now(timezone.utc)
-        dte = (datetime.strptime(expiration, '%Y-%m-%d') - today).days
-        witching = today.day > 14 and today.weekday() == 4 and today.month in [3, 6, 9, 12]
-        
-        if strike_oi:
-            max_pain = max(strike_oi.items(), key=lambda x: x[1])[0]
-            pain_points[symbol] = {"max_pain": max_pain, "dte": dte, "witching": witching}
-            print(f"Pain Point for {symbol}: Max Pain={max_pain}, DTE={dte}, Witching={witching}")
-            return max_pain
-        return None
+        expirations = max_pain_engine.compute(symbol, PAIN_EXPIRATIONS)
     except Exception as e:
         print(f"Failed to fetch pain point for {symbol}: {e}")
         return None
+    if not expirations:
+        print(f"No option open interest for {symbol}")
+        return None
+    pain = dict(expirations[0], expirations=expirations)
+    app_state.update_item("pain_points", symbol, pain)
+    metrics_engine.set_pain(symbol, pain)
+    print(f"Pain Point for {symbol}: " + ", ".join(f"{e['expiration']} Max Pain={e['max_pain']}" for e in expirations) + f", DTE={pain['dte']}, Witching={pain['witching']}")
+    return pain["max_pain"]
 
 def on_message(ws, message):
-    data = json.loads(message)
-    if data["type"] == "FEED_DATA":
-        event_type, event_data = data["data"]
-        if isinstance(event_data, list) and len(event_data) > 1:
-            symbol = event_data[1]
-            channel_id = ws.channel_id
-            if event_type == "Trade" and len(event_data) >= 4:
-                market_data[symbol]["price"] = float(event_data[2])
-                market_data[symbol]["volume"] += float(event_data[3])
-                print(f"Stream {channel_id} - Trade for {symbol}: Price={event_data[2]}, Size={event_data[3]}")
-            elif event_type == "Quote" and len(event_data) >= 4:
-                bid, ask = float(event_data[2]), float(event_data[3])
-                market_data[symbol]["price"] = (bid + ask) / 2
-                if market_data[symbol]["open"] == 0:
-                    market_data[symbol]["open"] = market_data[symbol]["price"]
-                print(f"Stream {channel_id} - Quote for {symbol}: Bid={bid}, Ask={ask}, Open={market_data[symbol]['open']}")
-            elif event_type == "Summary" and len(event_data) >= 3:
-                open_price = event_data[2]
-                if open_price != "NaN" and open_price:
-                    market_data[symbol]["open"] = float(open_price)
-                print(f"Stream {channel_id} - Summary for {symbol}: Open={open_price}")
-            market_data[symbol]["last_update"] = time.time()
-            
-            price = market_data[symbol]["price"]
-            open_price = market_data[symbol]["open"]
-            volume = market_data[symbol]["volume"]
-            avg_volume = market_data[symbol]["avg_volume"] or 1
-            rvol = volume / avg_volume if avg_volume > 0 else 0
-            change_price = price - open_price if open_price > 0 else 0
-            change_percent = (change_price / open_price * 100) if open_price > 0 else 0
-            color = "darkgreen" if change_percent > 0 else "darkred" if change_percent < 0 else "gray"
-            text_color = "orange" if INDICATORS[symbol]["sentiment"] == "positive" else "lightblue" if INDICATORS[symbol]["sentiment"] == "neutral" else "pink"
-            
-            pain = pain_points.get(symbol, {}).get("max_pain", "N/A")
-            dte = pain_points.get(symbol, {}).get("dte", "N/A")
-            witching = pain_points.get(symbol, {}).get("witching", False)
-            
-            socketio.emit('update_indicator', {
-                'symbol': symbol,
-                'price': round(price, 2),
-                'rvol': round(rvol, 2) if not pd.isna(rvol) else 0,
-                'change_price': round(change_price, 2),
-                'change_percent': round(change_percent, 2),
-                'color': color,
-                'text_color': text_color,
-                'max_pain': pain,
-                'dte': dte,
-                'witching': witching
-            })
+    for event_type, batch in feed_parser.parse_message(message):
+        # Metrics first: it adds the per-print session volume the bars and
+        # VWAP weight by, so they agree with the volume profile.
+        rows = metrics_engine.apply_batch(event_type, batch)
+        bar_aggregator.apply_batch(event_type, batch)
+        technicals.apply_batch(event_type, batch)
+        for row in rows:
+            publisher.publish(row["symbol"], row)
+
+def on_stream_message(ws, message):
+    if tick_recorder:
+        tick_recorder.record(message)
+    on_message(ws, message)
 
 def on_error(ws, error):
     print(f"Stream {ws.channel_id} - Error: {error}")
@@ -249,57 +314,21 @@ def on_error(ws, error):
 def on_close(ws, close_status_code, close_msg):
     print(f"Stream {ws.channel_id} - Connection closed.")
 
-def create_stream(api_quote_token, symbols, channel_id):
-    global streamer_thread
-    dxlink_url = "wss://tasty-openapi-ws.dxfeed.com/realtime"
-
-    def on_open(ws):
-        print(f"Stream {channel_id} connected for {symbols}")
-        ws.send(json.dumps({"type": "SETUP", "channel": 0, "version": "0.1-DXF-JS/0.3.0", "keepaliveTimeout": 60, "acceptKeepaliveTimeout": 60}))
-        ws.send(json.dumps({"type": "AUTH", "channel": 0, "token": api_quote_token}))
-        ws.send(json.dumps({"type": "CHANNEL_REQUEST", "channel": channel_id, "service": "FEED", "parameters": {"contract": "AUTO"}}))
-        ws.send(json.dumps({
-            "type": "FEED_SETUP",
-            "channel": channel_id,
-            "acceptAggregationPeriod": 0.1,
-            "acceptDataFormat": "COMPACT",
-            "acceptEventFields": {
-                "Trade": ["eventType", "eventSymbol", "price", "size"],
-                "Quote": ["eventType", "eventSymbol", "bidPrice", "askPrice"],
-                "Summary": ["eventType", "eventSymbol", "dayOpenPrice"]
-            }
-        }))
-        subscription = [{"type": "Trade", "symbol": s} for s in symbols] + \
-                      [{"type": "Quote", "symbol": s} for s in symbols] + \
-                      [{"type": "Summary", "symbol": s} for s in symbols]
-        ws.send(json.dumps({"type": "FEED_SUBSCRIPTION", "channel": channel_id, "reset": True, "add": subscription}))
-        
-        def keepalive():
-            while ws.keep_running:
-                ws.send(json.dumps({"type": "KEEPALIVE", "channel": 0}))
-                time.sleep(30)
-        threading.Thread(target=keepalive, daemon=True).start()
-
-    ws = websocket.WebSocketApp(
-        dxlink_url,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close
-    )
-    ws.channel_id = channel_id
-    
-    ws_thread = threading.Thread(target=ws.run_forever, kwargs={'sslopt': {"ca_certs": certifi.where()}}, daemon=True)
-    ws_thread.start()
-    return ws, ws_thread
+def on_open(ws, symbols):
+    # Volume traded while the shard was down arrives as one dayVolume jump;
+    # the first report after a (re)connect only resets the baseline.
+    metrics_engine.rebaseline(symbols)
+
+def start_streams(quote_token, symbols):
+    manager = StreamManager(quote_token, on_stream_message, on_error, on_close,
+                            max_symbols_per_shard=STREAM_SHARD_SIZE, aggregation_period=EMIT_INTERVAL,
+                            token_provider=get_quote_token, on_open=on_open)
+    manager.start(symbols)
+    return manager
 
-def stop_stream(streamer):
-    if streamer:
-        streamer[0].close()
-        streamer[1].join(timeout=2)
+MASTER_NEWS_QUERY = "market OR fed OR inflation OR gdp OR economic"
 
-def fetch_news(api_key, query="market OR fed OR inflation OR gdp OR economic"):
-    global master_sentiment
+def fetch_articles(api_key, query):
     url = "https://newsapi.org/v2/everything"
     params = {
         "q": query,
@@ -308,40 +337,46 @@ def fetch_news(api_key, query="market OR fed OR inflation OR gdp OR economic"):
         "sortBy": "publishedAt",
         "pageSize": 50
     }
+    response = http_client.get(url, params=params)
+    response.raise_for_status()
+    return response.json()["articles"]
+
+def fetch_news(api_key):
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        articles = response.json()["articles"]
-        analyzer = SentimentIntensityAnalyzer()
-        sentiments = []
-        news_feed.clear()
-        for article in articles:
-            title = article["title"]
-            sentiment = analyzer.polarity_scores(title)["compound"]
-            sentiments.append(sentiment)
-            news_feed.append({
-                "title": title,
-                "sentiment": sentiment,
-                "time": article["publishedAt"],
-                "url": article["url"]
-            })
-        master_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0
+        articles = fetch_articles(api_key, MASTER_NEWS_QUERY)
+        news_feed, added = sentiment_service.ingest(articles)
+        master_sentiment = sentiment_service.index()
+        app_state.update(news_feed=tuple(news_feed), master_sentiment=master_sentiment)
+        print(f"Scored {added} new of {len(news_feed)} articles, cache {sentiment_service.stats}")
         print(f"Master Sentiment Index: {master_sentiment}")
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch news: {e}")
-    socketio.emit('update_sentiment', {'master_sentiment': round(master_sentiment, 2)})
+    socketio.emit('update_sentiment', {'master_sentiment': round(app_state.master_sentiment, 2)})
+
+def search_news(api_key, query):
+    # Ad-hoc searches are scored into their own result list and cached per
+    # normalized query; they never feed the master window or app_state.
+    key = normalize_query(query)
+    if not key:
+        return []
+    return news_search_cache.get_or_load(key, lambda: sentiment_service.score_articles(fetch_articles(api_key, key)))
+
+def refresh_news_search(api_key, query):
+    try:
+        search_news(api_key, query)
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to search news for {query!r}: {e}")
 
 def fetch_forex_factory():
-    global upcoming_events
     if not ENABLE_FOREX_FACTORY:
         print("Forex Factory disabled in settings")
         return
     url = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         response.raise_for_status()
         events = response.json()
-        upcoming_events.clear()
+        upcoming_events = []
         for event in events:
             event_time = datetime.strptime(event["date"], "%Y-%m-%dT%H:%M:%S%z")
             if event.get("currency") == "USD":
@@ -354,54 +389,19 @@ def fetch_forex_factory():
                     "previous": event.get("previous", "N/A")
                 })
                 print(f"Upcoming USD Event: {event['title']} | Time: {event['date']} | Impact: {impact}")
+        app_state.update(upcoming_events=tuple(upcoming_events))
         print(f"Loaded {len(upcoming_events)} upcoming USD events from Forex Factory")
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch Forex Factory JSON: {e}")
 
 def fetch_fred_events():
-    global forex_events
-    forex_events.clear()
-    start = datetime.now(timezone.utc) - timedelta(days=1)
-    end = datetime.now(timezone.utc)
-    today = datetime.now(timezone.utc).date()
-    try:
-        for series, (title, impact) in CHAOS_EVENTS.items():
-            data = web.DataReader(series, "fred", start, end)
-            print(f"FRED Raw Data for {title}: {data.tail(2)}")
-            if not data.empty:
-                latest = data.iloc[-1]
-                event_time = latest.name.replace(tzinfo=timezone.utc)
-                if event_time.date() == today:
-                    actual = float(latest[series]) if pd.notna(latest[series]) else "N/A"
-                    previous = float(data.iloc[-2][series]) if len(data) > 1 else "N/A"
-                    color = "lightred" if impact == "high" else "lightorange" if impact == "medium" else "paleyellow"
-                    event = {
-                        "title": title,
-                        "time": event_time.strftime("%Y-%m-%dT%H:%M:%S%z"),
-                        "impact": impact,
-                        "actual": actual,
-                        "forecast": "N/A",
-                        "previous": previous,
-                        "color": color
-                    }
-                    for upcoming in upcoming_events:
-                        if upcoming["title"] == title and abs((datetime.strptime(upcoming["time"], "%Y-%m-%dT%H:%M:%S%z") - event_time).total_seconds()) < 3600:
-                            event["forecast"] = upcoming.get("forecast", "N/A")
-                            print(f"Cross-Correlated: {title} | FRED Actual: {actual} | FF Forecast: {event['forecast']}")
-                    forex_events.append(event)
-                    socketio.emit('update_events', event)
-                    print(f"FRED Event: {title} | Time: {event_time} | Actual: {actual} | Impact: {impact}")
-        forex_events.sort(key=lambda x: x["time"])
-        latest_event = next(
-            (e for e in reversed(forex_events) if datetime.strptime(e["time"], "%Y-%m-%dT%H:%M:%S%z") <= datetime.now(timezone.utc)),
-            forex_events[-1] if forex_events else None
-        )
-        if latest_event:
-            print(f"Latest FRED Event: {latest_event['title']} | Actual: {latest_event['actual']}")
-        return latest_event
-    except Exception as e:
-        print(f"FRED fetch failed: {e}")
-        return None
+    for event in fred_cache.refresh(app_state.upcoming_events):
+        socketio.emit('update_events', event)
+        print(f"FRED Event: {event['title']} | Time: {event['time']} | Actual: {event['actual']} | Impact: {event['impact']}")
+    _, latest_event = fred_cache.snapshot()
+    if latest_event:
+        print(f"Latest FRED Event: {latest_event['title']} | Actual: {latest_event['actual']}")
+    return latest_event
 
 @app.route('/')
 def index():
@@ -409,51 +409,63 @@ def index():
 
 @app.route('/indicator', methods=['GET'])
 def indicator_page():
-    indicators = []
-    for symbol, config in INDICATORS.items():
-        data = market_data[symbol]
-        price = data["price"]
-        open_price = data["open"]
-        volume = data["volume"]
-        avg_volume = data["avg_volume"]
-        
-        rvol = volume / avg_volume if avg_volume > 0 else 0
-        change_price = price - open_price if open_price > 0 else 0
-        change_percent = (change_price / open_price * 100) if open_price > 0 else 0
-        color = "darkgreen" if change_percent > 0 else "darkred" if change_percent < 0 else "gray"
-        text_color = "orange" if config["sentiment"] == "positive" else "lightblue" if config["sentiment"] == "neutral" else "pink"
-        
-        pain = pain_points.get(symbol, {}).get("max_pain", "N/A")
-        dte = pain_points.get(symbol, {}).get("dte", "N/A")
-        witching = pain_points.get(symbol, {}).get("witching", False)
-        
-        indicators.append({
-            "symbol": symbol,
-            "text_color": text_color,
-            "color": color,
-            "price": round(price, 2),
-            "rvol": round(rvol, 2) if not pd.isna(rvol) else 0,
-            "change_price": round(change_price, 2),
-            "change_percent": round(change_percent, 2),
-            "max_pain": pain,
-            "dte": dte,
-            "witching": witching
-        })
-    latest_event = fetch_fred_events()
-    headers = ["Symbol", "Price", "RVOL", "Change ($)", "Change (%)", "Max Pain", "DTE", "Witching"]
-    return render_template("indicator.html", indicators=indicators, forex_events=forex_events[:5], forex_event=latest_event, master_sentiment=round(master_sentiment, 2), headers=headers)
+    indicators = metrics_engine.rows(list(INDICATORS.keys()))
+    forex_events, latest_event = fred_cache.snapshot()
+    headers = ["Symbol", "Price", "RVOL", "RVOL (ToD)", "Change ($)", "Change (%)", "Max Pain", "DTE", "Witching", "POC", "Value Area"]
+    return render_template("indicator.html", indicators=indicators, forex_events=forex_events[:5], forex_event=latest_event, master_sentiment=round(app_state.master_sentiment, 2), headers=headers)
+
+@app.route('/publisher_stats')
+def publisher_stats():
+    return jsonify(publisher.snapshot_stats())
+
+@app.route('/volume_profile/<symbol>')
+def volume_profile(symbol):
+    return jsonify(volume_profiles.snapshot(symbol.upper()) or {})
+
+@app.route('/bars/<symbol>')
+def bars(symbol):
+    interval = request.args.get('interval', '1m')
+    if interval not in INTERVALS:
+        return jsonify({"error": f"interval must be one of {list(INTERVALS)}"}), 400
+    try:
+        since = float(request.args['since']) if 'since' in request.args else None
+        n = int(request.args.get('n', 60))
+        if since is not None and not math.isfinite(since) or n < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "since must be a unix timestamp and n a positive integer"}), 400
+    if since is not None:
+        window = bar_aggregator.since(symbol.upper(), interval, since)
+    else:
+        window = bar_aggregator.last(symbol.upper(), interval, min(n, CAPACITIES[interval]))
+    return jsonify(bars_to_json(window))
+
+@app.route('/technicals')
+@app.route('/technicals/<symbol>')
+def technicals_snapshot(symbol=None):
+    if symbol:
+        return jsonify(technicals.snapshot(symbol.upper()) or {})
+    return jsonify(technicals.snapshots(list(INDICATORS.keys())))
+
+@app.route('/stream_health')
+def stream_health():
+    return jsonify(stream_manager.health() if stream_manager else [])
 
 @app.route('/news', methods=['GET', 'POST'])
 def news_page():
     if request.method == 'POST':
-        company = request.form.get('company', '')
-        fetch_news(os.getenv("NEWSAPI_KEY"), query=company)
-        return render_template("news.html", news=news_feed)
-    return render_template("news.html", news=news_feed)
+        # Answered from the cache; a miss or stale entry is searched on the
+        # shared pool (coalesced per query) and shows up on the next submit.
+        company = normalize_query(request.form.get('company', ''))
+        results, fresh = news_search_cache.peek(company)
+        if company and not fresh:
+            http_client.submit(refresh_news_search, os.getenv("NEWSAPI_KEY"), company)
+        return render_template("news.html", news=results or [])
+    return render_template("news.html", news=app_state.news_feed)
 
 @app.route('/setup', methods=['GET', 'POST'])
 def setup_page():
-    global streamer_thread, streamer_symbols, session_token, ENABLE_FOREX_FACTORY, INDICATORS
+    global stream_manager, streamer_symbols, session_token, ENABLE_FOREX_FACTORY, INDICATORS
     if request.method == 'POST':
         print("Setup POST received")
         new_indicators = {}
@@ -467,22 +479,21 @@ def setup_page():
         INDICATORS = new_indicators if new_indicators else INDICATORS
         
         new_symbols = list(INDICATORS.keys())
+        metrics_engine.set_indicators(INDICATORS)
         if new_symbols != streamer_symbols:
-            print(f"Restarting stream with {new_symbols}")
-            stop_stream(streamer_thread)
             streamer_symbols = new_symbols
-            quote_token = login_and_get_quote_token(
-                os.getenv("TASTY_USERNAME"),
-                os.getenv("TASTY_PASSWORD"),
-                session_token,
-                os.getenv("TASTY_REMEMBER_TOKEN")
-            )
-            if quote_token:
-                for symbol in new_symbols:
-                    market_data[symbol]["avg_volume"] = fetch_historical_volume(symbol, session_token)
-                streamer_thread = create_stream(quote_token, streamer_symbols, 1)
+            if stream_manager:
+                added, removed = stream_manager.set_symbols(new_symbols)
+                print(f"Resubscribed stream: added {added}, removed {removed}")
+                if added:
+                    threading.Thread(target=warm_symbols, args=(added,), daemon=True).start()
+            else:
+                quote_token = get_quote_token()
+                if quote_token:
+                    stream_manager = start_streams(quote_token, streamer_symbols)
+                    threading.Thread(target=warm_symbols, args=(new_symbols,), daemon=True).start()
         
-        settings = {"indicators": INDICATORS, "enable_forex_factory": ENABLE_FOREX_FACTORY}
+        settings = {"indicators": INDICATORS, "enable_forex_factory": ENABLE_FOREX_FACTORY, "emit_interval": EMIT_INTERVAL, "record_ticks": RECORD_TICKS, "stream_shard_size": STREAM_SHARD_SIZE}
         with open(SETTINGS_FILE, 'w') as f:
             json.dump(settings, f)
         print(f"Saved settings to {SETTINGS_FILE}: {settings}")
@@ -495,41 +506,38 @@ def setup_page():
     negative_symbols = ','.join([s for s, c in INDICATORS.items() if c['sentiment'] == 'negative'])
     return render_template("setup.html", positive_symbols=positive_symbols, neutral_symbols=neutral_symbols, negative_symbols=negative_symbols, enable_forex_factory=ENABLE_FOREX_FACTORY)
 
-def news_thread():
-    api_key = os.getenv("NEWSAPI_KEY")
-    while True:
-        fetch_news(api_key)
-        time.sleep(300)
-
-def fred_thread():
-    while True:
-        fetch_fred_events()
-        time.sleep(600)
-
-def forex_daily_thread():
-    while True:
-        now = datetime.now(timezone.utc)
-        if ENABLE_FOREX_FACTORY and now.hour == 11 and now.minute == 0:
-            fetch_forex_factory()
-        time.sleep(60)
-
-def volume_profile_thread():
-    while True:
-        now = datetime.now(timezone.utc)
-        if now.weekday() == 0 and now.hour == 0 and now.minute == 0:
-            for symbol in INDICATORS.keys():
-                fetch_volume_profile(symbol)
-        time.sleep(60)
-
-def pain_point_thread():
-    while True:
-        now = datetime.now(timezone.utc)
-        for symbol in INDICATORS.keys():
-            fetch_pain_point(symbol, session_token)
-        time.sleep(3600)
+def refresh_profile_levels():
+    for symbol, levels in volume_profiles.levels(list(INDICATORS.keys())).items():
+        row = metrics_engine.set_profile(symbol, levels)
+        if row:
+            publisher.publish(symbol, row)
+
+def reset_session():
+    market_store.reset_session()
+    volume_profiles.reset()
+    technicals.reset_session()
+    for symbol in INDICATORS:
+        metrics_engine.set_profile(symbol, None)
+    metrics_engine.refresh()
+    print("Session volume, opens, volume profiles and VWAP reset for the new session")
+
+def refresh_pain_points():
+    max_pain_engine.prune()
+    http_client.fan_out(fetch_pain_point, list(INDICATORS.keys()))
+    print(f"Max pain chain cache: {max_pain_engine.stats}")
+
+def shutdown():
+    print("Shutting down all streams and server...")
+    if stream_manager:
+        stream_manager.stop()
+    publisher.stop()
+    if tick_recorder:
+        tick_recorder.stop()
+    save_daily_data()
 
 def save_daily_data():
-    daily_data = {symbol: {"price": data["price"], "volume": data["volume"]} for symbol, data in market_data.items()}
+    symbols, columns = market_store.board()
+    daily_data = {symbol: {"price": price, "volume": volume} for symbol, price, volume in zip(symbols, columns["price"].tolist(), columns["volume"].tolist())}
     with open(DAILY_FILE, 'w') as f:
         json.dump(daily_data, f)
     print(f"Saved daily data to {DAILY_FILE}")
@@ -537,43 +545,32 @@ def save_daily_data():
 if __name__ == "__main__":
     tasty_username = os.getenv("TASTY_USERNAME")
     tasty_password = os.getenv("TASTY_PASSWORD")
-    tasty_session_token = os.getenv("TASTY_SESSION_TOKEN")
-    tasty_remember_token = os.getenv("TASTY_REMEMBER_TOKEN")
     
     if not tasty_username or not tasty_password:
         print("Error: TASTY_USERNAME or TASTY_PASSWORD not found in .env file.")
     else:
-        quote_token = login_and_get_quote_token(
-            tasty_username,
-            tasty_password,
-            tasty_session_token,
-            tasty_remember_token
-        )
+        quote_token = get_quote_token()
         
         if quote_token:
-            for symbol in INDICATORS.keys():
-                market_data[symbol]["avg_volume"] = fetch_historical_volume(symbol, session_token)
+            warm_symbols(list(INDICATORS.keys()))
             streamer_symbols = list(INDICATORS.keys())
-            streamer_thread = create_stream(quote_token, streamer_symbols, 1)
+            publisher.start()
+            if tick_recorder:
+                tick_recorder.start()
+            stream_manager = start_streams(quote_token, streamer_symbols)
             
             flask_thread = threading.Thread(target=socketio.run, args=(app,), kwargs={"host": "0.0.0.0", "port": 5010}, daemon=True)
             flask_thread.start()
-            news_thread_instance = threading.Thread(target=news_thread, daemon=True)
-            news_thread_instance.start()
-            fred_thread_instance = threading.Thread(target=fred_thread, daemon=True)
-            fred_thread_instance.start()
-            forex_thread_instance = threading.Thread(target=forex_daily_thread, daemon=True)
-            forex_thread_instance.start()
-            volume_thread_instance = threading.Thread(target=volume_profile_thread, daemon=True)
-            volume_thread_instance.start()
-            pain_thread_instance = threading.Thread(target=pain_point_thread, daemon=True)
-            pain_thread_instance.start()
             
-            try:
-                while True:
-                    time.sleep(1)
-            except KeyboardInterrupt:
-                print("Shutting down all streams and server...")
-                save_daily_data()
+            runtime = Runtime()
+            runtime.every(300, fetch_news, os.getenv("NEWSAPI_KEY"), name="news")
+            runtime.every(60, fetch_fred_events, name="fred")
+            runtime.every(3600, refresh_pain_points, name="pain_points")
+            runtime.cron(fetch_forex_factory, hour=11, minute=0, name="forex_factory")
+            runtime.every(PROFILE_LEVELS_INTERVAL, refresh_profile_levels, name="profile_levels", run_now=False)
+            runtime.cron(reset_session, hour=SESSION_RESET_HOUR, minute=0, name="session_reset")
+            runtime.cron(refresh_volume_curves, hour=12, minute=0, name="volume_curves")
+            runtime.on_shutdown(shutdown)
+            runtime.run()
         else:
             print("Couldn’t start streaming without a quote token.")
\ No newline at end of file
@@ -0,0 +1,212 @@
+import threading
+import time
+import numpy as np
+
+COLUMNS = ("price", "open", "volume", "avg_volume", "last_update", "bid", "ask")
+PRICE, OPEN, VOLUME, AVG_VOLUME, LAST_UPDATE, BID, ASK = range(len(COLUMNS))
+
+
+def accumulate_volume(volume, day_volumes, slots, sizes, reported):
+    # The one volume rule for single trades and whole frames, applied in event
+    # order. A dayVolume report replaces the total, since it also covers
+    # prints the feed folded away or that were missed during a reconnect.
+    # Events without one add their size. Returns the volume each event added
+    # to the session: its size, or the rise since the slot's previous report.
+    # day_volumes holds that previous report, NaN until there is one, so the
+    # first report (after startup, a reconnect or a session reset) only sets
+    # the baseline and adds nothing.
+    added = []
+    for slot, size, day_volume in zip(slots, sizes, reported):
+        if day_volume is not None and day_volume == day_volume:
+            previous = day_volumes[slot]
+            added.append(day_volume - previous if day_volume >= previous else 0.0)
+            volume[slot] = day_volumes[slot] = day_volume
+        else:
+            size = size if size == size else 0.0
+            volume[slot] += size
+            added.append(size)
+    return added
+
+
+class MarketStateStore:
+    # One float64 row per column, one fixed slot per symbol. Reads of unknown
+    # symbols never create a slot; only add()/ensure() do.
+    def __init__(self, symbols=(), capacity=64):
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._symbols = []
+        self._data = np.zeros((len(COLUMNS), max(capacity, 1)))
+        self._day_volumes = np.full(max(capacity, 1), np.nan)
+        self.ensure(symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._slots
+
+    def __len__(self):
+        return len(self._symbols)
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    def slot(self, symbol):
+        return self._slots.get(symbol)
+
+    def add(self, symbol):
+        with self._lock:
+            slot = self._slots.get(symbol)
+            if slot is not None:
+                return slot
+            slot = len(self._symbols)
+            if slot >= self._data.shape[1]:
+                grown = np.zeros((len(COLUMNS), self._data.shape[1] * 2))
+                grown[:, :slot] = self._data
+                self._data = grown
+                self._day_volumes = np.concatenate((self._day_volumes, np.full(slot, np.nan)))
+            self._slots[symbol] = slot
+            self._symbols.append(symbol)
+            return slot
+
+    def ensure(self, symbols):
+        return [self.add(symbol) for symbol in symbols]
+
+    def set(self, symbol, column, value):
+        slot = self.add(symbol)
+        with self._lock:
+            self._data[COLUMNS.index(column), slot] = value
+
+    def get(self, symbol, column, default=0.0):
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return default
+        return float(self._data[COLUMNS.index(column), slot])
+
+    def record_trade(self, slot, price, size, day_volume=None, ts=None):
+        with self._lock:
+            if price == price:
+                self._data[PRICE, slot] = price
+            added = accumulate_volume(self._data[VOLUME], self._day_volumes, (slot,), (size,), (day_volume,))[0]
+            self._data[LAST_UPDATE, slot] = ts or time.time()
+        return added
+
+    def rebaseline(self, slots):
+        # The next dayVolume report for these slots sets the total without
+        # counting as traded volume (see accumulate_volume).
+        with self._lock:
+            self._day_volumes[slots] = np.nan
+
+    def reset_session(self):
+        # New session: volume and open start over, and the next dayVolume
+        # report replaces the total even when it is below yesterday's.
+        with self._lock:
+            self._data[VOLUME] = 0.0
+            self._data[OPEN] = 0.0
+            self._day_volumes[:] = np.nan
+
+    def record_quote(self, slot, bid, ask, ts=None):
+        if bid != bid or ask != ask:
+            return
+        with self._lock:
+            mid = (bid + ask) / 2
+            self._data[BID, slot] = bid
+            self._data[ASK, slot] = ask
+            self._data[PRICE, slot] = mid
+            if self._data[OPEN, slot] == 0:
+                self._data[OPEN, slot] = mid
+            self._data[LAST_UPDATE, slot] = ts or time.time()
+
+    def record_open(self, slot, open_price, ts=None):
+        if open_price != open_price or not open_price:
+            return
+        with self._lock:
+            self._data[OPEN, slot] = open_price
+            self._data[LAST_UPDATE, slot] = ts or time.time()
+
+    def values(self, slot, columns):
+        with self._lock:
+            return self._data[list(columns), slot].tolist()
+
+    @staticmethod
+    def _last_per_slot(slots):
+        # Index of the last event for every distinct slot, so later events in a
+        # batch win just as they would have one at a time.
+        unique, first_in_reversed = np.unique(slots[::-1], return_index=True)
+        return unique, len(slots) - 1 - first_in_reversed
+
+    def apply_trades(self, slots, prices, sizes, day_volumes=None, ts=None):
+        has_price = ~np.isnan(prices)
+        with self._lock:
+            data = self._data
+            unique, last = self._last_per_slot(slots[has_price])
+            data[PRICE, unique] = prices[has_price][last]
+            # Plain lists keep the per-event loop cheap for frames of a few
+            # hundred events; the rows are written back whole.
+            volume, previous = data[VOLUME].tolist(), self._day_volumes.tolist()
+            reported = day_volumes.tolist() if day_volumes is not None else [None] * len(slots)
+            added = accumulate_volume(volume, previous, slots.tolist(), sizes.tolist(), reported)
+            data[VOLUME] = volume
+            self._day_volumes[:] = previous
+            touched = np.unique(slots)
+            data[LAST_UPDATE, touched] = ts or time.time()
+        return touched, np.array(added)
+
+    def apply_quotes(self, slots, bids, asks, ts=None):
+        valid = ~(np.isnan(bids) | np.isnan(asks))
+        with self._lock:
+            data = self._data
+            unique, last = self._last_per_slot(slots[valid])
+            bids, asks = bids[valid][last], asks[valid][last]
+            mids = (bids + asks) / 2
+            data[BID, unique] = bids
+            data[ASK, unique] = asks
+            data[PRICE, unique] = mids
+            no_open = data[OPEN, unique] == 0
+            data[OPEN, unique[no_open]] = mids[no_open]
+            data[LAST_UPDATE, unique] = ts or time.time()
+        return unique
+
+    def apply_opens(self, slots, open_prices, ts=None):
+        valid = ~np.isnan(open_prices) & (open_prices != 0)
+        with self._lock:
+            unique, last = self._last_per_slot(slots[valid])
+            self._data[OPEN, unique] = open_prices[valid][last]
+            self._data[LAST_UPDATE, unique] = ts or time.time()
+        return unique
+
+    def columns_at(self, slots, columns):
+        with self._lock:
+            return self._data[np.ix_(list(columns), slots)].tolist()
+
+    def row(self, symbol):
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return None
+        with self._lock:
+            values = self._data[:, slot].tolist()
+        return dict(zip(COLUMNS, values))
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._symbols), self._data[:, :len(self._symbols)].copy()
+
+    @staticmethod
+    def derived(data):
+        price, open_price = data[PRICE], data[OPEN]
+        volume, avg_volume = data[VOLUME], data[AVG_VOLUME]
+        has_open = open_price > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rvol = np.where(avg_volume > 0, volume / avg_volume, 0.0)
+            change = np.where(has_open, price - open_price, 0.0)
+            change_pct = np.where(has_open, change / open_price * 100, 0.0)
+        rvol = np.nan_to_num(rvol, nan=0.0, posinf=0.0, neginf=0.0)
+        return {"rvol": rvol, "change": change, "change_pct": change_pct}
+
+    def board(self, symbols=None):
+        names, data = self.snapshot()
+        if symbols is None:
+            symbols = names
+        symbols = [s for s in symbols if self._slots.get(s, len(names)) < len(names)]
+        view = data[:, [self._slots[s] for s in symbols]]
+        columns = {name: view[i] for i, name in enumerate(COLUMNS)}
+        columns.update(self.derived(view))
+        return symbols, columns
@@ -0,0 +1,106 @@
+import threading
+import time
+import numpy as np
+from datetime import datetime, timezone
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def is_witching(expiration):
+    # Quarterly expirations land on the third Friday of Mar/Jun/Sep/Dec.
+    return expiration.weekday() == 4 and 15 <= expiration.day <= 21 and expiration.month in (3, 6, 9, 12)
+
+
+def chain_arrays(options):
+    # Collapses a chain listing into one row per strike with call and put open
+    # interest kept apart, since they pay out on opposite sides of the strike.
+    strikes = np.array([float(option["strike-price"]) for option in options])
+    open_interest = np.array([float(option.get("open-interest") or 0) for option in options])
+    is_call = np.array([str(option.get("option-type", "")).upper().startswith("C") for option in options], dtype=bool)
+    unique, inverse = np.unique(strikes, return_inverse=True)
+    call_oi = np.bincount(inverse, weights=np.where(is_call, open_interest, 0), minlength=len(unique))
+    put_oi = np.bincount(inverse, weights=np.where(is_call, 0, open_interest), minlength=len(unique))
+    return unique, call_oi, put_oi
+
+
+def holder_payoff(strikes, call_oi, put_oi):
+    # Total intrinsic value owed to option holders if the underlying settles at
+    # each strike: an (n, n) broadcast of settle - strike against both OI vectors.
+    diff = strikes[:, None] - strikes[None, :]
+    return np.maximum(diff, 0) @ call_oi + np.maximum(-diff, 0) @ put_oi
+
+
+def max_pain(strikes, call_oi, put_oi):
+    if not len(strikes) or not (call_oi.sum() + put_oi.sum()):
+        return None
+    return float(strikes[np.argmin(holder_payoff(strikes, call_oi, put_oi))])
+
+
+class MaxPainEngine:
+    # Chains are fetched once per (symbol, expiration) and kept for `ttl`
+    # seconds; open interest only updates overnight, so the hourly sweep mostly
+    # reuses cached arrays. Expiration lists are cached per symbol the same way.
+    def __init__(self, fetch_chain, fetch_expirations, ttl=3 * 3600, expirations_ttl=12 * 3600):
+        self.fetch_chain = fetch_chain
+        self.fetch_expirations = fetch_expirations
+        self.ttl = ttl
+        self.expirations_ttl = expirations_ttl
+        self._chains = {}
+        self._expirations = {}
+        self._lock = threading.Lock()
+        self.stats = {"chain_hits": 0, "chain_fetches": 0}
+
+    def expirations(self, symbol, count):
+        now = time.time()
+        with self._lock:
+            cached = self._expirations.get(symbol)
+        if cached is None or now - cached[0] >= self.expirations_ttl:
+            today = datetime.now(timezone.utc).date()
+            dates = sorted({datetime.strptime(value, DATE_FORMAT).date() for value in self.fetch_expirations(symbol)})
+            cached = (now, [date for date in dates if date >= today])
+            with self._lock:
+                self._expirations[symbol] = cached
+        return cached[1][:count]
+
+    def chain(self, symbol, expiration):
+        key = (symbol, expiration)
+        now = time.time()
+        with self._lock:
+            cached = self._chains.get(key)
+            if cached is not None and now - cached[0] < self.ttl:
+                self.stats["chain_hits"] += 1
+                return cached[1]
+        strikes, call_oi, put_oi = chain_arrays(self.fetch_chain(symbol, expiration.strftime(DATE_FORMAT)))
+        result = {
+            "strikes": strikes,
+            "call_oi": call_oi,
+            "put_oi": put_oi,
+            "max_pain": max_pain(strikes, call_oi, put_oi)
+        }
+        with self._lock:
+            self._chains[key] = (now, result)
+            self.stats["chain_fetches"] += 1
+        return result
+
+    def compute(self, symbol, count=3):
+        today = datetime.now(timezone.utc).date()
+        results = []
+        for expiration in self.expirations(symbol, count):
+            chain = self.chain(symbol, expiration)
+            if chain["max_pain"] is None:
+                continue
+            results.append({
+                "expiration": expiration.strftime(DATE_FORMAT),
+                "max_pain": chain["max_pain"],
+                "dte": (expiration - today).days,
+                "witching": is_witching(expiration),
+                "call_oi": float(chain["call_oi"].sum()),
+                "put_oi": float(chain["put_oi"].sum())
+            })
+        return results
+
+    def prune(self):
+        today = datetime.now(timezone.utc).date()
+        with self._lock:
+            for key in [key for key in self._chains if key[1] < today]:
+                del self._chains[key]
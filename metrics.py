@@ -0,0 +1,236 @@
+import threading
+import time
+import numpy as np
+from market_state import PRICE, OPEN, VOLUME, AVG_VOLUME
+from rvol_curve import VolumeCurves, time_of_day_rvol
+
+SENTIMENT_COLORS = {"positive": "orange", "neutral": "lightblue"}
+DEFAULT_TEXT_COLOR = "pink"
+NO_PAIN = {"max_pain": "N/A", "dte": "N/A", "witching": False}
+NO_PROFILE = {"poc": "N/A", "vah": "N/A", "val": "N/A"}
+
+
+def change_color(change_percent):
+    return "darkgreen" if change_percent > 0 else "darkred" if change_percent < 0 else "gray"
+
+
+class MetricsEngine:
+    # Owns the rendered indicator row for every symbol. Stream events update only
+    # the fields they touch; sentiment color and pain point are cached and only
+    # change through set_indicators()/set_pain(). Both /indicator and the push
+    # path read rows from here. Trades are also fed into the optional volume
+    # profile book, whose levels come back in through set_profile(). rvol_tod
+    # compares session volume with the share of avg_volume normally traded by
+    # the current minute.
+    def __init__(self, store, indicators=None, profiles=None, curves=None):
+        self.store = store
+        self.profiles = profiles
+        self.curves = curves or VolumeCurves()
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._text_colors = {}
+        self._pain = {}
+        self._profile = {}
+        self.set_indicators(indicators or {})
+
+    def _row(self, symbol):
+        row = self._rows.get(symbol)
+        if row is None:
+            row = {
+                "symbol": symbol,
+                "price": 0.0,
+                "rvol": 0.0,
+                "rvol_tod": 0.0,
+                "change_price": 0.0,
+                "change_percent": 0.0,
+                "color": "gray",
+                "text_color": self._text_colors.get(symbol, DEFAULT_TEXT_COLOR),
+            }
+            row.update(self._pain.get(symbol, NO_PAIN))
+            row.update(self._profile.get(symbol, NO_PROFILE))
+            self._rows[symbol] = row
+        return row
+
+    def set_indicators(self, indicators):
+        with self._lock:
+            self._text_colors = {symbol: SENTIMENT_COLORS.get(config.get("sentiment"), DEFAULT_TEXT_COLOR)
+                                 for symbol, config in indicators.items()}
+            for symbol, color in self._text_colors.items():
+                self._row(symbol)["text_color"] = color
+        self.store.ensure(indicators.keys())
+
+    def set_pain(self, symbol, pain):
+        pain = {key: pain.get(key, default) for key, default in NO_PAIN.items()}
+        with self._lock:
+            self._pain[symbol] = pain
+            self._row(symbol).update(pain)
+
+    def set_profile(self, symbol, levels):
+        profile = {key: levels.get(key, default) for key, default in NO_PROFILE.items()} if levels else NO_PROFILE
+        with self._lock:
+            if self._profile.get(symbol, NO_PROFILE) == profile:
+                return None
+            self._profile[symbol] = profile
+            row = self._row(symbol)
+            row.update(profile)
+            return dict(row)
+
+    def set_avg_volume(self, symbol, avg_volume):
+        self.store.set(symbol, "avg_volume", avg_volume)
+        self.refresh([symbol])
+
+    def set_volume_curve(self, symbol, shape):
+        self.store.ensure([symbol])
+        self.curves.set(self.store.slot(symbol), shape)
+        self.refresh([symbol])
+
+    def rebaseline(self, symbols):
+        slots = [slot for slot in map(self.store.slot, symbols) if slot is not None]
+        self.store.rebaseline(slots)
+
+    def _apply_change(self, row, price, open_price):
+        change = price - open_price if open_price > 0 else 0.0
+        change_percent = change / open_price * 100 if open_price > 0 else 0.0
+        row["change_price"] = round(change, 2)
+        row["change_percent"] = round(change_percent, 2)
+        row["color"] = change_color(change_percent)
+
+    def on_trade(self, symbol, slot, price, size, day_volume=None):
+        return self._trade(symbol, slot, price, size, day_volume)[1]
+
+    def _trade(self, symbol, slot, price, size, day_volume):
+        # Profile volume is what the print added to the session (the rise in
+        # dayVolume), so prints folded away by feed aggregation still land at
+        # the traded price.
+        added = self.store.record_trade(slot, price, size, day_volume)
+        if self.profiles is not None:
+            self.profiles.add(symbol, price, added)
+        price, volume, avg_volume, open_price = self.store.values(slot, (PRICE, VOLUME, AVG_VOLUME, OPEN))
+        rvol = volume / avg_volume if avg_volume > 0 else 0.0
+        rvol_tod = time_of_day_rvol(volume, avg_volume, self.curves.fraction(slot, time.time()))
+        with self._lock:
+            row = self._row(symbol)
+            row["price"] = round(price, 2)
+            row["rvol"] = round(rvol, 2) if rvol == rvol else 0.0
+            row["rvol_tod"] = round(rvol_tod, 2) if rvol_tod == rvol_tod else 0.0
+            self._apply_change(row, price, open_price)
+            return added, dict(row)
+
+    def on_quote(self, symbol, slot, bid, ask):
+        self.store.record_quote(slot, bid, ask)
+        price, open_price = self.store.values(slot, (PRICE, OPEN))
+        with self._lock:
+            row = self._row(symbol)
+            row["price"] = round(price, 2)
+            self._apply_change(row, price, open_price)
+            return dict(row)
+
+    def on_summary(self, symbol, slot, open_price):
+        self.store.record_open(slot, open_price)
+        price, open_price = self.store.values(slot, (PRICE, OPEN))
+        with self._lock:
+            row = self._row(symbol)
+            self._apply_change(row, price, open_price)
+            return dict(row)
+
+    def _apply_events(self, event_type, batch):
+        rows = {}
+        slot_of = self.store.slot
+        if event_type == "Trade":
+            day_volumes = batch.get("dayVolume") or [None] * batch["count"]
+            volumes = batch["volume"] = [size if size == size else 0.0 for size in batch["size"]]
+            for i, (symbol, price, size, day_volume) in enumerate(zip(batch["symbols"], batch["price"], batch["size"], day_volumes)):
+                slot = slot_of(symbol)
+                if slot is not None:
+                    volumes[i], rows[symbol] = self._trade(symbol, slot, price, size, day_volume)
+        elif event_type == "Quote":
+            for symbol, bid, ask in zip(batch["symbols"], batch["bidPrice"], batch["askPrice"]):
+                slot = slot_of(symbol)
+                if slot is not None:
+                    rows[symbol] = self.on_quote(symbol, slot, bid, ask)
+        elif event_type == "Summary":
+            for symbol, open_price in zip(batch["symbols"], batch["dayOpenPrice"]):
+                slot = slot_of(symbol)
+                if slot is not None:
+                    rows[symbol] = self.on_summary(symbol, slot, open_price)
+        return list(rows.values())
+
+    def apply_batch(self, event_type, batch):
+        # Trade batches come back with a "volume" column: what each print added
+        # to the session, for the bars and VWAP to weight by. Symbols outside
+        # the store keep their raw size.
+        if not batch.get("vectorized"):
+            return self._apply_events(event_type, batch)
+        slots = np.fromiter((self.store.slot(symbol) for symbol in batch["symbols"]), dtype=float, count=batch["count"])
+        known = ~np.isnan(slots)
+        if not known.any():
+            return []
+        slots = slots[known].astype(np.intp)
+        with_rvol = False
+        if event_type == "Trade":
+            day_volume = batch.get("dayVolume")
+            prices = batch["price"][known]
+            touched, added = self.store.apply_trades(slots, prices, batch["size"][known],
+                                                     day_volume[known] if day_volume is not None else None)
+            if self.profiles is not None:
+                self.profiles.add_batch([symbol for symbol, ok in zip(batch["symbols"], known) if ok], prices, added)
+            volumes = batch["volume"] = np.nan_to_num(batch["size"])
+            volumes[known] = added
+            with_rvol = True
+        elif event_type == "Quote":
+            touched = self.store.apply_quotes(slots, batch["bidPrice"][known], batch["askPrice"][known])
+        elif event_type == "Summary":
+            touched = self.store.apply_opens(slots, batch["dayOpenPrice"][known])
+        else:
+            return []
+        return self._update_rows(touched, with_rvol)
+
+    def _update_rows(self, slots, with_rvol):
+        if not len(slots):
+            return []
+        names = self.store.symbols
+        prices, open_prices, volumes, avg_volumes = self.store.columns_at(slots, (PRICE, OPEN, VOLUME, AVG_VOLUME))
+        fractions = self.curves.fractions(slots, time.time()).tolist() if with_rvol else None
+        rows = []
+        with self._lock:
+            for i, slot in enumerate(slots.tolist()):
+                row = self._row(names[slot])
+                price = prices[i]
+                row["price"] = round(price, 2)
+                if with_rvol:
+                    rvol = volumes[i] / avg_volumes[i] if avg_volumes[i] > 0 else 0.0
+                    row["rvol"] = round(rvol, 2) if rvol == rvol else 0.0
+                    rvol_tod = time_of_day_rvol(volumes[i], avg_volumes[i], fractions[i])
+                    row["rvol_tod"] = round(rvol_tod, 2) if rvol_tod == rvol_tod else 0.0
+                self._apply_change(row, price, open_prices[i])
+                rows.append(dict(row))
+        return rows
+
+    def refresh(self, symbols=None):
+        symbols, columns = self.store.board(symbols)
+        prices = np.round(columns["price"], 2).tolist()
+        rvols = np.round(columns["rvol"], 2).tolist()
+        expected = columns["avg_volume"] * self.curves.fractions([self.store.slot(symbol) for symbol in symbols], time.time())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rvol_tods = np.round(np.nan_to_num(np.where(expected > 0, columns["volume"] / expected, 0.0)), 2).tolist()
+        changes = np.round(columns["change"], 2).tolist()
+        change_percents = np.round(columns["change_pct"], 2).tolist()
+        raw_change_percents = columns["change_pct"].tolist()
+        with self._lock:
+            for i, symbol in enumerate(symbols):
+                row = self._row(symbol)
+                row["price"] = prices[i]
+                row["rvol"] = rvols[i]
+                row["rvol_tod"] = rvol_tods[i]
+                row["change_price"] = changes[i]
+                row["change_percent"] = change_percents[i]
+                row["color"] = change_color(raw_change_percents[i])
+
+    def row(self, symbol):
+        with self._lock:
+            row = self._rows.get(symbol)
+            return dict(row) if row else None
+
+    def rows(self, symbols):
+        with self._lock:
+            return [dict(self._row(symbol)) for symbol in symbols]
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_query(query):
+    return " ".join((query or "").lower().split())
+
+
+class QueryCache:
+    # TTL + LRU cache for ad-hoc search results with single-flight loading:
+    # concurrent callers asking for the same missing key wait on one shared
+    # Future instead of each calling upstream.
+    def __init__(self, ttl=900, max_entries=200):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def peek(self, key):
+        # (value, fresh) without loading; value is None on a miss. Lets a
+        # request answer from the cache and leave the refresh to a worker.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            return entry[1], time.time() - entry[0] < self.ttl
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_or_load(self, key, loader, timeout=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+                owner = True
+        if not owner:
+            return future.result(timeout=timeout)
+        try:
+            value = loader()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            with self._lock:
+                self._entries[key] = (time.time(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
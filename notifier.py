@@ -0,0 +1,208 @@
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime, timezone
+from email.mime.text import MIMEText
+import http_client
+
+DIGEST_WINDOW = 5.0
+DEDUP_TTL = 15 * 60
+SMTP_IDLE_TIMEOUT = 5 * 60
+
+
+class SMTPSink:
+    # Keeps one logged-in SMTP session open between alerts. A session the
+    # server dropped (or one idle long enough that it probably did) is
+    # reopened and the send retried once.
+    name = "smtp"
+
+    def __init__(self, sender, password, receiver, host="smtp.gmail.com", port=587, starttls=True, timeout=10):
+        self.sender = sender
+        self.password = password
+        self.receiver = receiver
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server = None
+        self._last_used = 0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.password:
+            server.login(self.sender, self.password)
+        self._server = server
+
+    def send(self, subject, body):
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self.sender
+        msg["To"] = self.receiver
+        if self._server is not None and time.time() - self._last_used > SMTP_IDLE_TIMEOUT:
+            self.close()
+        for attempt in range(2):
+            try:
+                if self._server is None:
+                    self._connect()
+                self._server.send_message(msg)
+                self._last_used = time.time()
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+
+class WebhookSink:
+    name = "webhook"
+
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, subject, body):
+        response = http_client.post(self.url, json={"subject": subject, "body": body})
+        response.raise_for_status()
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    # One JSON line per notification; handy as a local stand-in for email.
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, subject, body):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = {"ts": datetime.now(timezone.utc).isoformat(), "subject": subject, "body": body}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(line) + "\n")
+
+    def close(self):
+        pass
+
+
+class NotificationDispatcher:
+    # notify() only enqueues, so alert sources (the stream thread, the
+    # breakout monitor) never wait on a mail server. The worker collects
+    # everything raised within `window` seconds of the first alert, drops
+    # repeats of a key already sent within `dedup_ttl`, and delivers one
+    # message (a digest when several survive) to every sink.
+    def __init__(self, sinks, window=DIGEST_WINDOW, dedup_ttl=DEDUP_TTL, max_queue=100):
+        self.sinks = list(sinks)
+        self.window = window
+        self.dedup_ttl = dedup_ttl
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._sent = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"queued": 0, "dropped": 0, "deduplicated": 0, "messages": 0, "alerts": 0, "failures": 0}
+
+    def notify(self, subject, body, key=None):
+        try:
+            self._queue.put_nowait((subject, body, key))
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+            print(f"Notification queue full, dropped: {subject}")
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + self.window
+        while True:
+            remaining = deadline - time.time()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _dedupe(self, batch):
+        now = time.time()
+        alerts = []
+        for subject, body, key in batch:
+            if key is not None:
+                if now - self._sent.get(key, 0) < self.dedup_ttl:
+                    self.stats["deduplicated"] += 1
+                    continue
+                self._sent[key] = now
+            alerts.append((subject, body))
+        for key in [key for key, sent in self._sent.items() if now - sent >= self.dedup_ttl]:
+            del self._sent[key]
+        return alerts
+
+    @staticmethod
+    def digest(alerts):
+        if len(alerts) == 1:
+            return alerts[0]
+        subject = f"{len(alerts)} alerts: " + ", ".join(subject for subject, _ in alerts)
+        body = "\n\n".join(f"{subject}\n{body}" for subject, body in alerts)
+        return subject, body
+
+    def _deliver(self, alerts):
+        subject, body = self.digest(alerts)
+        for sink in self.sinks:
+            try:
+                sink.send(subject, body)
+            except Exception as e:
+                self.stats["failures"] += 1
+                print(f"Failed to send notification via {sink.name}: {e}")
+        self.stats["messages"] += 1
+        self.stats["alerts"] += len(alerts)
+        print(f"Notification sent to {len(self.sinks)} sink(s): {subject}")
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            alerts = self._dedupe(self._collect())
+            if alerts:
+                self._deliver(alerts)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.window + 15)
+        for sink in self.sinks:
+            sink.close()
+
+
+def sinks_from_env():
+    # EMAIL_* selects SMTP (EMAIL_SMTP_HOST/PORT/STARTTLS point it at a local
+    # stand-in), NOTIFY_WEBHOOK_URL a webhook, NOTIFY_FILE a JSON-lines file.
+    sinks = []
+    sender, password, receiver = os.getenv("EMAIL_SENDER"), os.getenv("EMAIL_PASSWORD"), os.getenv("EMAIL_RECEIVER")
+    if sender and receiver:
+        sinks.append(SMTPSink(sender, password, receiver,
+                              host=os.getenv("EMAIL_SMTP_HOST", "smtp.gmail.com"),
+                              port=int(os.getenv("EMAIL_SMTP_PORT", 587)),
+                              starttls=os.getenv("EMAIL_STARTTLS", "1") != "0"))
+    if os.getenv("NOTIFY_WEBHOOK_URL"):
+        sinks.append(WebhookSink(os.getenv("NOTIFY_WEBHOOK_URL")))
+    if os.getenv("NOTIFY_FILE"):
+        sinks.append(FileSink(os.getenv("NOTIFY_FILE")))
+    return sinks
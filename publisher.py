@@ -0,0 +1,77 @@
+import threading
+import time
+
+
+class IndicatorPublisher:
+    # Sits between on_message and Socket.IO: keeps only the latest row per symbol
+    # and flushes everything pending as one 'update_indicators' frame per tick.
+    def __init__(self, socketio, interval=0.1, max_symbols=1000, event="update_indicators", stats_every=60):
+        self.socketio = socketio
+        self.interval = interval
+        self.max_symbols = max_symbols
+        self.event = event
+        self.stats_every = stats_every
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"published": 0, "coalesced": 0, "dropped": 0, "frames": 0, "rows": 0}
+
+    def publish(self, symbol, row):
+        with self._lock:
+            if symbol in self._pending:
+                self.stats["coalesced"] += 1
+            elif len(self._pending) >= self.max_symbols:
+                self.stats["dropped"] += 1
+                return False
+            self._pending[symbol] = row
+            self.stats["published"] += 1
+        return True
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = list(self._pending.values())
+            self._pending = {}
+        try:
+            self.socketio.emit(self.event, batch)
+        except Exception as e:
+            with self._lock:
+                self.stats["dropped"] += len(batch)
+            print(f"Publisher emit failed, dropped {len(batch)} rows: {e}")
+            return 0
+        with self._lock:
+            self.stats["frames"] += 1
+            self.stats["rows"] += len(batch)
+        return len(batch)
+
+    def snapshot_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def _run(self):
+        last_report = time.monotonic()
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            delay = next_tick - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            next_tick = max(next_tick + self.interval, time.monotonic())
+            self.flush()
+            if self.stats_every and time.monotonic() - last_report >= self.stats_every:
+                print(f"Publisher stats: {self.snapshot_stats()}")
+                last_report = time.monotonic()
+        self.flush()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+TICK_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ticks")
+
+
+class TickRecorder:
+    # record() is called on the websocket thread and only enqueues. A writer
+    # thread drains the queue in batches and appends gzip members to one file
+    # per UTC day; each line is [receive_ts, raw_frame].
+    def __init__(self, root=TICK_ROOT, batch_size=500, flush_interval=1.0, max_queue=100000):
+        self.root = root
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"recorded": 0, "dropped": 0, "batches": 0}
+
+    def path_for(self, ts):
+        day = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self.root, f"{day}.jsonl.gz")
+
+    def record(self, message, ts=None):
+        if '"FEED_DATA"' not in message:
+            return
+        try:
+            self._queue.put_nowait((ts or time.time(), message))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _drain(self, block):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        by_path = {}
+        for ts, message in batch:
+            by_path.setdefault(self.path_for(ts), []).append(json.dumps([ts, message]))
+        for path, lines in by_path.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, "at", compresslevel=6) as f:
+                f.write("\n".join(lines) + "\n")
+        self.stats["recorded"] += len(batch)
+        self.stats["batches"] += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    self.stats["dropped"] += len(batch)
+                    print(f"Tick recorder write failed: {e}")
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                break
+            self._write(batch)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
@@ -0,0 +1,84 @@
+import argparse
+import gzip
+import json
+import time
+from dxlink_parser import CompactParser
+from stream_manager import EVENT_FIELDS
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.frames = 0
+        self.rows = 0
+        self.events = {}
+
+    def emit(self, event, data=None, **kwargs):
+        self.frames += 1
+        self.events[event] = self.events.get(event, 0) + 1
+        if isinstance(data, list):
+            self.rows += len(data)
+
+
+class ReplayWS:
+    def __init__(self, channel_id=1):
+        self.channel_id = channel_id
+        self.keep_running = True
+
+    def send(self, message):
+        pass
+
+
+def read_ticks(path):
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                ts, message = json.loads(line)
+                yield ts, message
+
+
+def recorded_symbols(path):
+    parser = CompactParser(EVENT_FIELDS)
+    symbols = set()
+    for _, message in read_ticks(path):
+        for _, batch in parser.parse_message(message):
+            symbols.update(batch["symbols"])
+    return sorted(symbols)
+
+
+def replay(path, handler, speed=1.0, ws=None):
+    # speed=1 replays at recorded pace, speed=N at N times faster, and
+    # speed=0 (or None) as fast as the handler can take it.
+    ws = ws or ReplayWS()
+    count = 0
+    first_recv = None
+    start = time.monotonic()
+    for ts, message in read_ticks(path):
+        if speed:
+            if first_recv is None:
+                first_recv = ts
+            delay = (ts - first_recv) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        handler(ws, message)
+        count += 1
+    elapsed = time.monotonic() - start
+    return {"frames": count, "seconds": round(elapsed, 3), "frames_per_second": round(count / elapsed, 1) if elapsed > 0 else 0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded DXLink tick log through main.on_message")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=0, help="1 = real time, N = N times faster, 0 = max speed")
+    args = parser.parse_args()
+
+    import main
+    fake = FakeSocketIO()
+    main.socketio = fake
+    main.publisher.socketio = fake
+    main.metrics_engine.store.ensure(recorded_symbols(args.path))
+    main.publisher.start()
+    result = replay(args.path, main.on_message, speed=args.speed)
+    main.publisher.stop()
+    result.update({"socketio_frames": fake.frames, "socketio_rows": fake.rows, "publisher": main.publisher.snapshot_stats()})
+    print(f"Replay finished: {result}")
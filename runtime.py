@@ -0,0 +1,122 @@
+import asyncio
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+
+class AppState:
+    # Single owner for state shared between the Flask routes, the stream and
+    # the scheduled jobs. Writers swap in whole new values under the lock, so
+    # readers always get a consistent object without holding it.
+    def __init__(self, **fields):
+        self._lock = threading.RLock()
+        self._fields = dict(fields)
+
+    def __getattr__(self, name):
+        fields = self.__dict__.get("_fields")
+        if fields is None or name not in fields:
+            raise AttributeError(name)
+        return fields[name]
+
+    def update(self, **fields):
+        with self._lock:
+            self._fields.update(fields)
+
+    def update_item(self, name, key, value):
+        with self._lock:
+            current = dict(self._fields[name])
+            current[key] = value
+            self._fields[name] = current
+
+    def snapshot(self, *names):
+        with self._lock:
+            return {name: self._fields[name] for name in (names or self._fields)}
+
+
+def next_cron_time(now, minute=0, hour=None, weekday=None):
+    candidate = now.replace(second=0, microsecond=0, minute=minute)
+    if hour is not None:
+        candidate = candidate.replace(hour=hour)
+    step = timedelta(hours=1) if hour is None else timedelta(days=1)
+    while candidate <= now or (weekday is not None and candidate.weekday() != weekday):
+        candidate += step
+    return candidate
+
+
+class Runtime:
+    # One asyncio loop drives every periodic and cron-style job. Job bodies are
+    # the existing blocking fetchers, run on a small executor so a slow call
+    # never delays the schedule; a job never overlaps with itself.
+    def __init__(self, max_workers=4):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.jobs = []
+        self.shutdown_hooks = []
+        self._stopping = None
+
+    def every(self, seconds, func, *args, name=None, run_now=True):
+        name = name or func.__name__
+        self.jobs.append((name, self._every(name, seconds, func, args, run_now)))
+
+    def cron(self, func, *args, minute=0, hour=None, weekday=None, name=None):
+        name = name or func.__name__
+        self.jobs.append((name, self._cron(name, func, args, minute, hour, weekday)))
+
+    def on_shutdown(self, func, *args):
+        self.shutdown_hooks.append((func, args))
+
+    async def _call(self, name, func, args):
+        try:
+            await self.loop.run_in_executor(self.executor, func, *args)
+        except Exception as e:
+            print(f"Job {name} failed: {e}")
+
+    async def _every(self, name, seconds, func, args, run_now):
+        next_run = self.loop.time() + (0 if run_now else seconds)
+        while True:
+            await asyncio.sleep(max(0, next_run - self.loop.time()))
+            await self._call(name, func, args)
+            next_run = max(next_run + seconds, self.loop.time())
+
+    async def _cron(self, name, func, args, minute, hour, weekday):
+        while True:
+            now = datetime.now(timezone.utc)
+            due = next_cron_time(now, minute, hour, weekday)
+            print(f"Job {name} next run at {due.isoformat()}")
+            # Sleep in bounded steps so clock jumps (suspend, NTP) are noticed.
+            while datetime.now(timezone.utc) < due:
+                await asyncio.sleep(min(60, (due - datetime.now(timezone.utc)).total_seconds()))
+            await self._call(name, func, args)
+
+    def stop(self):
+        if self._stopping and not self._stopping.is_set():
+            self.loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        tasks = [self.loop.create_task(coro, name=name) for name, coro in self.jobs]
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for func, args in self.shutdown_hooks:
+                try:
+                    func(*args)
+                except Exception as e:
+                    print(f"Shutdown step {func.__name__} failed: {e}")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.loop.close()
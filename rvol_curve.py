@@ -0,0 +1,95 @@
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = dt_time(9, 30)
+SESSION_MINUTES = 390
+# Without intraday history a symbol falls back to an even pace through the day.
+LINEAR_SHAPE = np.arange(1, SESSION_MINUTES + 1) / SESSION_MINUTES
+
+
+def session_minutes(ts):
+    local = pd.to_datetime(ts, unit="s", utc=True).tz_convert(MARKET_TZ)
+    minutes = (local.hour * 60 + local.minute - (SESSION_OPEN.hour * 60 + SESSION_OPEN.minute)).to_numpy()
+    return minutes, local.date
+
+
+def curve_from_bars(bars, bar_minutes=5):
+    # Average cumulative share of the day's volume reached by the end of each
+    # session minute. Each bar's volume is spread evenly over its minutes, and
+    # every day is normalized to its own total so one heavy day can't dominate.
+    if not len(bars):
+        return None
+    minutes, dates = session_minutes(bars["ts"])
+    in_session = (minutes >= 0) & (minutes < SESSION_MINUTES)
+    days = {}
+    for minute, day, volume in zip(minutes[in_session], dates[in_session], bars["volume"][in_session]):
+        per_minute = days.get(day)
+        if per_minute is None:
+            per_minute = days[day] = np.zeros(SESSION_MINUTES)
+        per_minute[minute:minute + bar_minutes] += volume / bar_minutes
+    shapes = []
+    for per_minute in days.values():
+        cumulative = np.cumsum(per_minute)
+        if cumulative[-1] > 0:
+            shapes.append(cumulative / cumulative[-1])
+    return np.mean(shapes, axis=0) if shapes else None
+
+
+class VolumeCurves:
+    # Expected fraction of daily volume by minute of session, one row per
+    # market_state slot. Live RVOL is volume / (avg_volume * shape[minute]),
+    # and the current minute is derived from a cached session-open timestamp,
+    # so each tick costs one subtraction and one array read.
+    def __init__(self, capacity=64):
+        self._lock = threading.Lock()
+        self._shapes = np.tile(LINEAR_SHAPE, (max(capacity, 1), 1))
+        self._open_ts = None
+        self._day_end_ts = 0
+
+    def set(self, slot, shape):
+        with self._lock:
+            if slot >= len(self._shapes):
+                grown = np.tile(LINEAR_SHAPE, (max(slot + 1, len(self._shapes) * 2), 1))
+                grown[:len(self._shapes)] = self._shapes
+                self._shapes = grown
+            self._shapes[slot] = LINEAR_SHAPE if shape is None else shape
+
+    def _roll(self, now):
+        local = datetime.fromtimestamp(now, MARKET_TZ)
+        session_open = datetime.combine(local.date(), SESSION_OPEN, MARKET_TZ)
+        # On weekends the open is pushed past the day so every read lands on
+        # the full-day share.
+        self._open_ts = session_open.timestamp() if local.weekday() < 5 else float("inf")
+        self._day_end_ts = datetime.combine(local.date() + timedelta(days=1), dt_time(0), MARKET_TZ).timestamp()
+
+    def minute(self, now):
+        # Outside the session the full-day share is used, so the reading
+        # degrades to plain volume / avg_volume instead of blowing up on
+        # pre-market prints or last session's leftover volume.
+        if now >= self._day_end_ts:
+            self._roll(now)
+        minute = int((now - self._open_ts) // 60) if now >= self._open_ts else SESSION_MINUTES - 1
+        return min(minute, SESSION_MINUTES - 1)
+
+    def fraction(self, slot, now):
+        minute = self.minute(now)
+        shapes = self._shapes
+        return float(shapes[slot, minute] if slot < len(shapes) else LINEAR_SHAPE[minute])
+
+    def fractions(self, slots, now):
+        minute = self.minute(now)
+        shapes = self._shapes
+        slots = np.asarray(slots, dtype=np.intp)
+        known = slots < len(shapes)
+        out = np.full(len(slots), LINEAR_SHAPE[minute])
+        out[known] = shapes[slots[known], minute]
+        return out
+
+
+def time_of_day_rvol(volume, avg_volume, fraction):
+    expected = avg_volume * fraction
+    return volume / expected if expected > 0 else 0.0
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+
+def normalize_headline(title):
+    return " ".join((title or "").lower().split())
+
+
+def headline_key(title):
+    return hashlib.blake2b(normalize_headline(title).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def published_ts(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return time.time()
+
+
+class SentimentService:
+    # Long-lived VADER scorer. Scores are cached by normalized headline hash,
+    # and the master index is a time-decayed mean over a bounded window of the
+    # most recent distinct articles, updated only with articles not seen yet.
+    def __init__(self, cache_size=5000, window=500, half_life=6 * 3600):
+        self.analyzer = SentimentIntensityAnalyzer()
+        self.cache_size = cache_size
+        self.half_life = half_life
+        self._cache = OrderedDict()
+        self._window = deque(maxlen=window)
+        self._window_keys = set()
+        self._weighted_sum = 0.0
+        self._weight_total = 0.0
+        self._ref_ts = time.time()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def score(self, title):
+        return self.score_batch([title])[0]
+
+    def score_batch(self, titles):
+        keys = [headline_key(title) for title in titles]
+        scores = [None] * len(titles)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+            self.stats["hits"] += len(titles) - len(missing)
+            self.stats["misses"] += len(missing)
+        fresh = {}
+        for i in missing:
+            if keys[i] not in fresh:
+                fresh[keys[i]] = self.analyzer.polarity_scores(titles[i] or "")["compound"]
+            scores[i] = fresh[keys[i]]
+        if fresh:
+            with self._lock:
+                for key, value in fresh.items():
+                    self._cache[key] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def _weight(self, ts):
+        return 0.5 ** ((self._ref_ts - ts) / self.half_life)
+
+    def _advance(self, now):
+        # Decay both running sums to `now` so each article costs O(1) to add
+        # or evict instead of re-weighting the whole window.
+        if now > self._ref_ts:
+            factor = 0.5 ** ((now - self._ref_ts) / self.half_life)
+            self._weighted_sum *= factor
+            self._weight_total *= factor
+            self._ref_ts = now
+
+    def score_articles(self, articles):
+        # Scores a result list without touching the master window, for ad-hoc
+        # searches that must not move the index.
+        titles = [article.get("title") or "" for article in articles]
+        scores = self.score_batch(titles)
+        return [{
+            "title": title,
+            "sentiment": score,
+            "time": article.get("publishedAt"),
+            "url": article.get("url")
+        } for article, title, score in zip(articles, titles, scores)]
+
+    def ingest(self, articles):
+        feed = self.score_articles(articles)
+        added = 0
+        with self._lock:
+            self._advance(time.time())
+            for article, item in zip(articles, feed):
+                title, score = item["title"], item["sentiment"]
+                key = headline_key(title)
+                if key in self._window_keys:
+                    continue
+                if len(self._window) == self._window.maxlen:
+                    old_ts, old_score, old_key = self._window.popleft()
+                    self._window_keys.discard(old_key)
+                    weight = self._weight(old_ts)
+                    self._weighted_sum -= weight * old_score
+                    self._weight_total -= weight
+                ts = min(published_ts(article.get("publishedAt")), self._ref_ts)
+                weight = self._weight(ts)
+                self._window.append((ts, score, key))
+                self._window_keys.add(key)
+                self._weighted_sum += weight * score
+                self._weight_total += weight
+                added += 1
+        return feed, added
+
+    def index(self):
+        # Decay scales numerator and denominator alike, so the mean can be
+        # read without advancing the reference time.
+        with self._lock:
+            return self._weighted_sum / self._weight_total if self._weight_total > 1e-12 else 0
@@ -0,0 +1,307 @@
+import json
+import random
+import threading
+import time
+import certifi
+import websocket
+
+DXLINK_URL = "wss://tasty-openapi-ws.dxfeed.com/realtime"
+EVENT_TYPES = ("Trade", "Quote", "Summary")
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+STABLE_CONNECTION_SECONDS = 60
+EVENT_FIELDS = {
+    "Trade": ["eventType", "eventSymbol", "price", "size", "dayVolume"],
+    "Quote": ["eventType", "eventSymbol", "bidPrice", "askPrice"],
+    "Summary": ["eventType", "eventSymbol", "dayOpenPrice"]
+}
+
+
+def subscription_entries(symbols):
+    return [{"type": event_type, "symbol": s} for event_type in EVENT_TYPES for s in symbols]
+
+
+class StreamShard:
+    # One DXLink connection carrying one FEED channel for a subset of symbols.
+    # Each shard has its own socket and reader thread, so a slow or dropped
+    # shard leaves the others running. The reader thread is also the
+    # supervisor: when run_forever returns it reconnects with jittered
+    # exponential backoff, asks token_provider for a (cached) quote token and
+    # resubscribes everything with reset=True. on_open gets the shard's symbols
+    # on every (re)connect, before any of their events arrive. When DXLink
+    # rejects the token the shard drops the connection and reconnects with
+    # token_provider(force=True).
+    def __init__(self, shard_id, quote_token, on_message, on_error=None, on_close=None,
+                 aggregation_period=0.1, url=DXLINK_URL, token_provider=None, on_open=None):
+        self.shard_id = shard_id
+        self.channel_id = shard_id * 2 + 1
+        self.quote_token = quote_token
+        self.handler = on_message
+        self.error_handler = on_error
+        self.close_handler = on_close
+        self.open_handler = on_open
+        self.aggregation_period = aggregation_period
+        self.url = url
+        self.token_provider = token_provider
+        self.symbols = set()
+        self.ws = None
+        self.thread = None
+        self.ready = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._opened_at = None
+        self._unauthorized = 0
+        self._token_rejected = False
+        self.health = {"connected": False, "authorized": False, "messages": 0, "last_message": 0, "errors": 0, "connects": 0, "reconnects": 0}
+
+    def _send(self, payload):
+        self.ws.send(json.dumps(payload))
+
+    def _on_open(self, ws):
+        print(f"Stream {self.channel_id} connected for {sorted(self.symbols)}")
+        self._send({"type": "SETUP", "channel": 0, "version": "0.1-DXF-JS/0.3.0", "keepaliveTimeout": 60, "acceptKeepaliveTimeout": 60})
+        self._send({"type": "AUTH", "channel": 0, "token": self.quote_token})
+        self._send({"type": "CHANNEL_REQUEST", "channel": self.channel_id, "service": "FEED", "parameters": {"contract": "AUTO"}})
+        self._send({
+            "type": "FEED_SETUP",
+            "channel": self.channel_id,
+            "acceptAggregationPeriod": self.aggregation_period,
+            "acceptDataFormat": "COMPACT",
+            "acceptEventFields": EVENT_FIELDS
+        })
+        with self._lock:
+            if self.open_handler:
+                self.open_handler(ws, sorted(self.symbols))
+            self._send({"type": "FEED_SUBSCRIPTION", "channel": self.channel_id, "reset": True, "add": subscription_entries(sorted(self.symbols))})
+            self.ready = True
+        self._opened_at = time.time()
+        self._unauthorized = 0
+        self.health["authorized"] = False
+        self.health["connected"] = True
+        self.health["connects"] += 1
+        threading.Thread(target=self._keepalive, args=(ws,), daemon=True).start()
+
+    def _keepalive(self, ws):
+        while ws.keep_running and ws is self.ws and not self._stopped.is_set():
+            if not (ws.sock and ws.sock.connected):
+                break
+            try:
+                ws.send(json.dumps({"type": "KEEPALIVE", "channel": 0}))
+            except (websocket.WebSocketConnectionClosedException, OSError):
+                break
+            self._stopped.wait(30)
+
+    def _on_message(self, ws, message):
+        self.health["messages"] += 1
+        self.health["last_message"] = time.time()
+        # Substring test first so FEED_DATA frames are not decoded twice.
+        if "AUTH_STATE" in message:
+            data = json.loads(message)
+            if data.get("type") == "AUTH_STATE":
+                self._on_auth_state(ws, data.get("state"))
+        self.handler(ws, message)
+
+    def _on_auth_state(self, ws, state):
+        # DXLink greets every connection with UNAUTHORIZED before it has
+        # checked the token, so only a later one means the token was rejected
+        # or has expired.
+        if state == "AUTHORIZED":
+            self.health["authorized"] = True
+            return
+        self._unauthorized += 1
+        if self.health["authorized"] or self._unauthorized > 1:
+            print(f"Stream {self.channel_id} - quote token rejected, reconnecting with a fresh one")
+            self.health["authorized"] = False
+            self._token_rejected = True
+            ws.close()
+
+    def _on_error(self, ws, error):
+        self.health["errors"] += 1
+        if self.error_handler:
+            self.error_handler(ws, error)
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        self.ready = False
+        self.health["connected"] = False
+        if self.close_handler:
+            self.close_handler(ws, close_status_code, close_msg)
+
+    def _connect(self):
+        ws = websocket.WebSocketApp(
+            self.url,
+            on_open=self._on_open,
+            on_message=self._on_message,
+            on_error=self._on_error,
+            on_close=self._on_close
+        )
+        ws.channel_id = self.channel_id
+        self.ws = ws
+        return ws
+
+    def _run(self):
+        attempt = 0
+        connect = True
+        while not self._stopped.is_set():
+            if connect:
+                self._opened_at = None
+                ws = self._connect()
+                try:
+                    ws.run_forever(sslopt={"ca_certs": certifi.where()})
+                except Exception as e:
+                    print(f"Stream {self.channel_id} - run_forever failed: {e}")
+                self.ready = False
+                self.health["connected"] = False
+                if self._stopped.is_set():
+                    break
+                if self._opened_at and time.time() - self._opened_at >= STABLE_CONNECTION_SECONDS:
+                    attempt = 0
+            delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+            attempt += 1
+            self.health["reconnects"] += 1
+            print(f"Stream {self.channel_id} - reconnecting in {delay:.1f}s (attempt {attempt})")
+            if self._stopped.wait(delay):
+                break
+            # A failed token refresh backs off again instead of reconnecting.
+            connect = not self.token_provider or self._refresh_token()
+
+    def _refresh_token(self):
+        # A raising provider must not kill the supervisor thread. A provider
+        # that returns nothing leaves the current token in place.
+        try:
+            token = self.token_provider(force=True) if self._token_rejected else self.token_provider()
+        except Exception as e:
+            print(f"Stream {self.channel_id} - quote token refresh failed: {e}")
+            return False
+        if token:
+            self.quote_token = token
+            self._token_rejected = False
+        return True
+
+    def start(self):
+        self._stopped.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self.ws:
+            self.ws.close()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def update(self, add=(), remove=()):
+        add = [s for s in add if s not in self.symbols]
+        remove = [s for s in remove if s in self.symbols]
+        if not add and not remove:
+            return
+        with self._lock:
+            self.symbols.update(add)
+            self.symbols.difference_update(remove)
+            if not self.ready:
+                return
+            message = {"type": "FEED_SUBSCRIPTION", "channel": self.channel_id}
+            if add:
+                message["add"] = subscription_entries(add)
+            if remove:
+                message["remove"] = subscription_entries(remove)
+            try:
+                self._send(message)
+            except websocket.WebSocketConnectionClosedException:
+                # The full set goes out with reset=True on the next open.
+                self.ready = False
+        print(f"Stream {self.channel_id} subscription +{add} -{remove}")
+
+    def status(self):
+        status = dict(self.health)
+        status.update({"channel": self.channel_id, "symbols": len(self.symbols), "ready": self.ready})
+        return status
+
+
+class StreamManager:
+    # Spreads the watchlist over shards of at most max_symbols_per_shard and
+    # applies watchlist changes as add/remove diffs on the live connections.
+    def __init__(self, quote_token, on_message, on_error=None, on_close=None, max_symbols_per_shard=50,
+                 aggregation_period=0.1, token_provider=None, on_open=None):
+        self.quote_token = quote_token
+        self.on_message = on_message
+        self.on_error = on_error
+        self.on_close = on_close
+        self.on_open = on_open
+        self.max_symbols_per_shard = max_symbols_per_shard
+        self.aggregation_period = aggregation_period
+        self.token_provider = token_provider
+        self.shards = []
+        self.assignment = {}
+        self._lock = threading.Lock()
+
+    @property
+    def symbols(self):
+        return list(self.assignment.keys())
+
+    def _new_shard(self):
+        if self.token_provider:
+            try:
+                self.quote_token = self.token_provider() or self.quote_token
+            except Exception as e:
+                # The shard starts with the last good token and refreshes on
+                # its own reconnects.
+                print(f"Quote token refresh failed, starting shard with the current token: {e}")
+        shard = StreamShard(len(self.shards), self.quote_token, self.on_message, self.on_error, self.on_close,
+                            self.aggregation_period, token_provider=self.token_provider, on_open=self.on_open)
+        self.shards.append(shard)
+        return shard
+
+    def _pick_shard(self, pending):
+        open_shards = [s for s in self.shards if len(s.symbols) + len(pending[s]) < self.max_symbols_per_shard]
+        if not open_shards:
+            shard = self._new_shard()
+            pending[shard] = []
+            return shard
+        return min(open_shards, key=lambda s: len(s.symbols) + len(pending[s]))
+
+    def add(self, symbols):
+        with self._lock:
+            pending = {shard: [] for shard in self.shards}
+            for symbol in symbols:
+                if symbol in self.assignment:
+                    continue
+                shard = self._pick_shard(pending)
+                pending[shard].append(symbol)
+                self.assignment[symbol] = shard
+            for shard, added in pending.items():
+                if added:
+                    shard.update(add=added)
+                    if shard.thread is None:
+                        shard.start()
+
+    def remove(self, symbols):
+        with self._lock:
+            pending = {}
+            for symbol in symbols:
+                shard = self.assignment.pop(symbol, None)
+                if shard:
+                    pending.setdefault(shard, []).append(symbol)
+            for shard, removed in pending.items():
+                shard.update(remove=removed)
+
+    def set_symbols(self, symbols):
+        current = set(self.assignment)
+        wanted = list(dict.fromkeys(symbols))
+        removed = [s for s in current if s not in set(wanted)]
+        added = [s for s in wanted if s not in current]
+        if removed:
+            self.remove(removed)
+        if added:
+            self.add(added)
+        return added, removed
+
+    def start(self, symbols):
+        self.add(symbols)
+
+    def stop(self):
+        with self._lock:
+            for shard in self.shards:
+                shard.stop()
+
+    def health(self):
+        return [shard.status() for shard in self.shards]
@@ -0,0 +1,383 @@
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Named after the forex EA settings so the two can be passed straight through.
+DEFAULT_PERIODS = {"FastEMA_Period": 20, "SlowEMA_Period": 50, "RSI_Period": 14, "ATR_Period": 14, "ROC_Period": 10}
+
+
+def seeded_smoothing(values, period, alpha):
+    # Recursive smoothing seeded with the simple mean of the first `period`
+    # values, matching the streaming objects below; aligned to values[period - 1:].
+    values = np.asarray(values, dtype=float)
+    if len(values) < period:
+        return np.zeros(0)
+    series = np.concatenate(([values[:period].mean()], values[period:]))
+    return pd.Series(series).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def ema_series(values, period):
+    return seeded_smoothing(values, period, 2 / (period + 1))
+
+
+def rsi_value(avg_gain, avg_loss):
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def rsi_series(closes, period):
+    changes = np.diff(np.asarray(closes, dtype=float))
+    avg_gain = seeded_smoothing(np.clip(changes, 0, None), period, 1 / period)
+    avg_loss = seeded_smoothing(np.clip(-changes, 0, None), period, 1 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss > 0, 100 - 100 / (1 + avg_gain / avg_loss), np.where(avg_gain > 0, 100.0, 50.0))
+    return rsi, avg_gain, avg_loss
+
+
+def true_range(highs, lows, closes):
+    highs, lows, closes = (np.asarray(a, dtype=float) for a in (highs, lows, closes))
+    prev = closes[:-1]
+    tr = np.maximum.reduce([highs[1:] - lows[1:], np.abs(highs[1:] - prev), np.abs(lows[1:] - prev)])
+    return np.concatenate((highs[:1] - lows[:1], tr))
+
+
+def atr_series(highs, lows, closes, period):
+    return seeded_smoothing(true_range(highs, lows, closes), period, 1 / period)
+
+
+def roc_series(closes, period):
+    closes = np.asarray(closes, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (closes[period:] - closes[:-period]) / closes[:-period] * 100
+
+
+def vwap_series(highs, lows, closes, volumes):
+    typical = (np.asarray(highs) + np.asarray(lows) + np.asarray(closes)) / 3
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.cumsum(typical * volumes) / np.cumsum(volumes)
+
+
+class EMA:
+    __slots__ = ("period", "alpha", "value", "_count", "_sum")
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = None
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, x):
+        if self.value is None:
+            self._count += 1
+            self._sum += x
+            if self._count == self.period:
+                self.value = self._sum / self.period
+            return self.value
+        self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def peek(self, x):
+        if self.value is None:
+            return (self._sum + x) / self.period if self._count + 1 == self.period else None
+        return self.value + self.alpha * (x - self.value)
+
+    def backfill(self, values):
+        self.__init__(self.period)
+        series = ema_series(values, self.period)
+        if len(series):
+            self.value = float(series[-1])
+            self._count = self.period
+        else:
+            for x in values:
+                self.update(float(x))
+
+
+class WilderRSI:
+    __slots__ = ("period", "prev", "avg_gain", "avg_loss", "_count", "_gains", "_losses")
+
+    def __init__(self, period):
+        self.period = period
+        self.prev = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self._count = 0
+        self._gains = 0.0
+        self._losses = 0.0
+
+    @property
+    def value(self):
+        return None if self.avg_gain is None else rsi_value(self.avg_gain, self.avg_loss)
+
+    def _step(self, close):
+        change = close - self.prev
+        gain, loss = (change, 0.0) if change > 0 else (0.0, -change)
+        if self.avg_gain is None:
+            count = self._count + 1
+            if count < self.period:
+                return None, None, count, self._gains + gain, self._losses + loss
+            return (self._gains + gain) / self.period, (self._losses + loss) / self.period, count, 0.0, 0.0
+        n = self.period
+        return (self.avg_gain * (n - 1) + gain) / n, (self.avg_loss * (n - 1) + loss) / n, self._count, 0.0, 0.0
+
+    def update(self, close):
+        if self.prev is not None:
+            self.avg_gain, self.avg_loss, self._count, self._gains, self._losses = self._step(close)
+        self.prev = close
+        return self.value
+
+    def peek(self, close):
+        if self.prev is None:
+            return None
+        avg_gain, avg_loss = self._step(close)[:2]
+        return None if avg_gain is None else rsi_value(avg_gain, avg_loss)
+
+    def backfill(self, closes):
+        self.__init__(self.period)
+        _, avg_gain, avg_loss = rsi_series(closes, self.period)
+        if len(avg_gain):
+            self.avg_gain, self.avg_loss = float(avg_gain[-1]), float(avg_loss[-1])
+            self._count = self.period
+            self.prev = float(closes[-1])
+        else:
+            for close in closes:
+                self.update(float(close))
+
+
+class ATR:
+    __slots__ = ("period", "prev_close", "value", "_count", "_sum")
+
+    def __init__(self, period):
+        self.period = period
+        self.prev_close = None
+        self.value = None
+        self._count = 0
+        self._sum = 0.0
+
+    def _range(self, high, low):
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def update(self, high, low, close):
+        tr = self._range(high, low)
+        self.prev_close = close
+        if self.value is None:
+            self._count += 1
+            self._sum += tr
+            if self._count == self.period:
+                self.value = self._sum / self.period
+            return self.value
+        self.value += (tr - self.value) / self.period
+        return self.value
+
+    def peek(self, high, low):
+        if self.value is None:
+            return None
+        return self.value + (self._range(high, low) - self.value) / self.period
+
+    def backfill(self, highs, lows, closes):
+        self.__init__(self.period)
+        series = atr_series(highs, lows, closes, self.period)
+        if len(series):
+            self.value = float(series[-1])
+            self._count = self.period
+            self.prev_close = float(closes[-1])
+        else:
+            for high, low, close in zip(highs, lows, closes):
+                self.update(float(high), float(low), float(close))
+
+
+class ROC:
+    __slots__ = ("period", "window")
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period + 1)
+
+    @property
+    def value(self):
+        window = self.window
+        if len(window) <= self.period or not window[0]:
+            return None
+        return (window[-1] - window[0]) / window[0] * 100
+
+    def update(self, x):
+        self.window.append(x)
+        return self.value
+
+    def peek(self, x):
+        window = self.window
+        if len(window) < self.period:
+            return None
+        base = window[-self.period]
+        return (x - base) / base * 100 if base else None
+
+    def backfill(self, closes):
+        self.window.clear()
+        self.window.extend(float(close) for close in closes[-(self.period + 1):])
+
+
+class VWAP:
+    __slots__ = ("pv", "volume")
+
+    def __init__(self):
+        self.pv = 0.0
+        self.volume = 0.0
+
+    @property
+    def value(self):
+        return self.pv / self.volume if self.volume > 0 else None
+
+    def update(self, price, volume):
+        self.pv += price * volume
+        self.volume += volume
+        return self.value
+
+    def backfill(self, highs, lows, closes, volumes):
+        typical = (np.asarray(highs) + np.asarray(lows) + np.asarray(closes)) / 3
+        self.pv = float(np.dot(typical, volumes))
+        self.volume = float(np.sum(volumes))
+
+
+class TechnicalSet:
+    # Bar-based state advances on closed bars; snapshot() peeks the last tick
+    # through every indicator without committing it, so levels and crossovers
+    # read at tick latency while the bar is still forming.
+    __slots__ = ("fast", "slow", "rsi", "atr", "roc", "vwap", "last", "high", "low")
+
+    def __init__(self, periods):
+        self.fast = EMA(periods["FastEMA_Period"])
+        self.slow = EMA(periods["SlowEMA_Period"])
+        self.rsi = WilderRSI(periods["RSI_Period"])
+        self.atr = ATR(periods["ATR_Period"])
+        self.roc = ROC(periods["ROC_Period"])
+        self.vwap = VWAP()
+        self.last = None
+        self.high = None
+        self.low = None
+
+    def on_bar(self, high, low, close):
+        self.fast.update(close)
+        self.slow.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.roc.update(close)
+        self.high = self.low = None
+
+    def on_tick(self, price, volume=0.0):
+        self.last = price
+        if self.high is None or price > self.high:
+            self.high = price
+        if self.low is None or price < self.low:
+            self.low = price
+        if volume > 0:
+            self.vwap.update(price, volume)
+
+    def backfill(self, bars, session_start=None):
+        if not len(bars):
+            return
+        highs, lows, closes = bars["high"], bars["low"], bars["close"]
+        self.fast.backfill(closes)
+        self.slow.backfill(closes)
+        self.rsi.backfill(closes)
+        self.atr.backfill(highs, lows, closes)
+        self.roc.backfill(closes)
+        session = bars[bars["ts"] >= session_start] if session_start is not None else bars[:0]
+        self.vwap.backfill(session["high"], session["low"], session["close"], session["volume"])
+        if self.last is None:
+            self.last = float(closes[-1])
+
+    def snapshot(self):
+        price = self.last
+        if price is None:
+            return None
+        fast, slow = self.fast.peek(price), self.slow.peek(price)
+        trend = cross = None
+        if fast is not None and slow is not None:
+            trend = "bullish" if fast > slow else "bearish"
+            if self.fast.value is not None and self.slow.value is not None and (self.fast.value > self.slow.value) != (fast > slow):
+                cross = "up" if fast > slow else "down"
+        atr = self.atr.peek(self.high, self.low) if self.high is not None else self.atr.value
+        values = {
+            "price": price,
+            "ema_fast": fast,
+            "ema_slow": slow,
+            "rsi": self.rsi.peek(price),
+            "atr": atr,
+            "roc": self.roc.peek(price),
+            "vwap": self.vwap.value
+        }
+        snapshot = {key: round(float(value), 4) if value is not None else None for key, value in values.items()}
+        snapshot.update(trend=trend, cross=cross)
+        return snapshot
+
+
+class TechnicalsEngine:
+    # One TechnicalSet per symbol, fed closed bars by a BarAggregator listener
+    # and ticks by the stream. Changing periods drops all state; callers then
+    # backfill from whichever bars they hold.
+    def __init__(self, periods=None):
+        self.periods = dict(DEFAULT_PERIODS, **(periods or {}))
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def _set(self, symbol):
+        technicals = self._sets.get(symbol)
+        if technicals is None:
+            technicals = self._sets[symbol] = TechnicalSet(self.periods)
+        return technicals
+
+    def set_periods(self, periods):
+        with self._lock:
+            self.periods = dict(self.periods, **periods)
+            self._sets = {}
+
+    def on_bar(self, symbol, bar):
+        _, _, high, low, close, _ = bar
+        with self._lock:
+            self._set(symbol).on_bar(high, low, close)
+
+    def on_tick(self, symbol, price, volume=0.0):
+        if price != price:
+            return
+        with self._lock:
+            self._set(symbol).on_tick(price, volume if volume == volume else 0.0)
+
+    def on_ticks(self, symbols, prices, volumes=None):
+        prices = prices.tolist() if isinstance(prices, np.ndarray) else prices
+        volumes = volumes.tolist() if isinstance(volumes, np.ndarray) else volumes or [0.0] * len(prices)
+        sets = self._sets
+        with self._lock:
+            for symbol, price, volume in zip(symbols, prices, volumes):
+                if price == price:
+                    (sets.get(symbol) or self._set(symbol)).on_tick(price, volume if volume == volume else 0.0)
+
+    def apply_batch(self, event_type, batch):
+        if event_type == "Trade":
+            self.on_ticks(batch["symbols"], batch["price"], batch.get("volume", batch["size"]))
+        elif event_type == "Quote":
+            bids, asks = batch["bidPrice"], batch["askPrice"]
+            mids = (bids + asks) / 2 if batch.get("vectorized") else [(bid + ask) / 2 for bid, ask in zip(bids, asks)]
+            self.on_ticks(batch["symbols"], mids)
+
+    def backfill(self, symbol, bars, session_start=None):
+        with self._lock:
+            self._set(symbol).backfill(bars, session_start)
+
+    def reset_session(self):
+        with self._lock:
+            for technicals in self._sets.values():
+                technicals.vwap = VWAP()
+
+    def snapshot(self, symbol):
+        with self._lock:
+            technicals = self._sets.get(symbol)
+            return technicals.snapshot() if technicals else None
+
+    def snapshots(self, symbols=None):
+        with self._lock:
+            symbols = list(self._sets) if symbols is None else symbols
+            return {symbol: self._sets[symbol].snapshot() for symbol in symbols if symbol in self._sets}
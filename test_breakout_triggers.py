@@ -0,0 +1,52 @@
+from breakout_triggers import TriggerEngine
+
+LEVELS = [
+    {"direction": "above", "level": 5010.0, "side": "Long"},
+    {"direction": "below", "level": 4990.0, "side": "Short"}
+]
+
+
+def engine():
+    fired = []
+    triggers = TriggerEngine(lambda symbol, trigger, price: fired.append((symbol, trigger["side"], price)), quote_confirm=2.0)
+    triggers.set_triggers("^GSPC", LEVELS)
+    return triggers, fired
+
+
+def quote(triggers, mid, ts):
+    triggers.apply_batch("Quote", {"symbols": ["^GSPC"], "bidPrice": [mid - 0.25], "askPrice": [mid + 0.25]}, ts)
+
+
+def test_index_quote_mids_fire_once_confirmed():
+    triggers, fired = engine()
+    quote(triggers, 5005.0, 100.0)
+    assert triggers.last_price("^GSPC") == 5005.0
+    quote(triggers, 5011.0, 101.0)
+    quote(triggers, 5012.0, 102.0)
+    assert fired == []
+    quote(triggers, 5012.5, 103.0)
+    assert fired == [("^GSPC", "Long", 5012.5)]
+    quote(triggers, 5020.0, 110.0)
+    assert len(fired) == 1
+
+
+def test_index_quote_flicker_does_not_fire():
+    triggers, fired = engine()
+    quote(triggers, 5011.0, 100.0)
+    quote(triggers, 5009.0, 100.5)
+    quote(triggers, 5011.0, 101.0)
+    quote(triggers, 5009.0, 102.5)
+    quote(triggers, 4989.0, 103.0)
+    quote(triggers, 5000.0, 104.0)
+    assert fired == []
+
+
+def test_quotes_ignored_once_symbol_prints():
+    triggers, fired = engine()
+    triggers.on_tick("^GSPC", 5000.0)
+    quote(triggers, 5011.0, 100.0)
+    quote(triggers, 5011.0, 105.0)
+    assert fired == []
+    assert triggers.last_price("^GSPC") == 5000.0
+    triggers.on_tick("^GSPC", 5010.5)
+    assert fired == [("^GSPC", "Long", 5010.5)]
@@ -0,0 +1,16 @@
+import pytest
+import main
+
+
+@pytest.mark.parametrize("query", ["since=abc", "since=nan", "since=inf", "since=-inf", "since=1e400", "n=0", "n=x"])
+def test_bars_rejects_malformed_window(query):
+    response = main.app.test_client().get(f"/bars/SPY?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("query", ["since=0", "n=5", "n=100000"])
+def test_bars_accepts_valid_window(query):
+    response = main.app.test_client().get(f"/bars/SPY?{query}")
+    assert response.status_code == 200
+    assert response.get_json() == []
@@ -0,0 +1,74 @@
+import math
+import random
+import pytest
+from dxlink_parser import CompactParser, VECTOR_MIN_EVENTS
+from market_state import MarketStateStore
+from metrics import MetricsEngine
+from volume_profile import VolumeProfileBook
+
+SYMBOLS = ["SPY", "QQQ", "IWM"]
+parser = CompactParser({"Trade": ["eventType", "eventSymbol", "price", "size", "dayVolume"]})
+
+
+def trade_frame(events):
+    return ["Trade", [value for event in events for value in ("Trade",) + event]]
+
+
+def replay(frames):
+    store = MarketStateStore(SYMBOLS)
+    profiles = VolumeProfileBook()
+    engine = MetricsEngine(store, profiles=profiles)
+    for frame in frames:
+        for event_type, batch in parser.parse(frame):
+            engine.apply_batch(event_type, batch)
+    return store, profiles
+
+
+def scalar_and_vectorized(events):
+    # Same events once as one frame and once a frame per event, so one run
+    # goes through apply_trades and the other through record_trade.
+    assert len(events) >= VECTOR_MIN_EVENTS
+    return replay([trade_frame(events)]), replay([trade_frame([event]) for event in events])
+
+
+def random_events(rng, count):
+    day_volumes = {symbol: rng.randrange(10 ** 6, 10 ** 7) for symbol in SYMBOLS}
+    events = []
+    for _ in range(count):
+        symbol = rng.choice(SYMBOLS)
+        size = rng.randrange(1, 500)
+        day_volumes[symbol] += size
+        day_volume = day_volumes[symbol] if rng.random() < 0.7 else math.nan
+        events.append((symbol, round(100 + rng.random(), 2), size if rng.random() < 0.9 else math.nan, day_volume))
+    return events
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scalar_and_vectorized_trades_agree(seed):
+    rng = random.Random(seed)
+    (store, profiles), (scalar_store, scalar_profiles) = scalar_and_vectorized(random_events(rng, rng.randrange(16, 200)))
+    for symbol in SYMBOLS:
+        assert store.row(symbol)["volume"] == scalar_store.row(symbol)["volume"]
+        assert store.row(symbol)["price"] == scalar_store.row(symbol)["price"]
+        profile, scalar_profile = profiles.snapshot(symbol), scalar_profiles.snapshot(symbol)
+        assert (profile or {}).get("volume") == pytest.approx((scalar_profile or {}).get("volume"))
+
+
+@pytest.mark.parametrize("count", [VECTOR_MIN_EVENTS - 1, VECTOR_MIN_EVENTS])
+def test_sizes_after_day_volume_report_add_on_either_path(count):
+    events = [("SPY", 500.0, 100, 40_000_000)] + [("SPY", 500.0, 100, math.nan)] * (count - 1)
+    store, _ = replay([trade_frame(events)])
+    assert store.row("SPY")["volume"] == 40_000_000 + 100 * (count - 1)
+
+
+def test_reset_session_starts_volume_and_open_over():
+    store = MarketStateStore(["SPY"])
+    store.record_open(0, 500.0)
+    store.record_trade(0, 501.0, 100, 40_000_000)
+    store.record_trade(0, 501.0, 100, math.nan)
+    store.reset_session()
+    assert store.row("SPY")["volume"] == 0.0
+    assert store.row("SPY")["open"] == 0.0
+    assert store.record_trade(0, 502.0, 200, 1_200) == 0.0
+    store.record_trade(0, 502.0, 300, math.nan)
+    assert store.row("SPY")["volume"] == 1_500
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from bar_aggregator import BarAggregator
+from market_state import MarketStateStore
+from metrics import MetricsEngine
+from technicals import TechnicalsEngine
+from volume_profile import VolumeProfileBook
+
+
+def engine():
+    store = MarketStateStore(["SPY"])
+    return MetricsEngine(store, profiles=VolumeProfileBook()), store
+
+
+def profile_volume(metrics):
+    return (metrics.profiles.snapshot("SPY") or {}).get("volume", 0.0)
+
+
+def test_first_trade_seeds_day_volume_without_profiling_it():
+    metrics, store = engine()
+    metrics.on_trade("SPY", 0, 500.0, 5000, 40_000_000)
+    assert store.row("SPY")["volume"] == 40_000_000
+    assert profile_volume(metrics) == 0.0
+    metrics.on_trade("SPY", 0, 500.5, 300, 40_000_300)
+    assert profile_volume(metrics) == 300
+
+
+def test_first_trade_in_vectorized_frame_seeds_day_volume():
+    metrics, store = engine()
+    count = 20
+    batch = {
+        "symbols": ["SPY"] * count,
+        "count": count,
+        "vectorized": True,
+        "price": np.full(count, 500.0),
+        "size": np.full(count, 100.0),
+        "dayVolume": 40_000_000 + 100 * np.arange(count, dtype=float)
+    }
+    metrics.apply_batch("Trade", batch)
+    assert store.row("SPY")["volume"] == 40_000_000 + 100 * (count - 1)
+    assert profile_volume(metrics) == 100 * (count - 1)
+
+
+def test_reconnect_gap_is_not_profiled():
+    metrics, store = engine()
+    metrics.on_trade("SPY", 0, 500.0, 100, 1_000_000)
+    metrics.on_trade("SPY", 0, 500.0, 100, 1_000_100)
+    metrics.rebaseline(["SPY"])
+    metrics.on_trade("SPY", 0, 510.0, 100, 3_000_000)
+    assert store.row("SPY")["volume"] == 3_000_000
+    assert profile_volume(metrics) == 100
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_bars_and_vwap_weight_by_profiled_volume(vectorized):
+    # Each event folds 500 shares of prints but reports a size of 10.
+    metrics, store = engine()
+    bars, technicals = BarAggregator(), TechnicalsEngine()
+    count = 20
+    prices = [100.0 + i for i in range(count)]
+    columns = {"price": prices, "size": [10.0] * count, "dayVolume": [1_000_000.0 + 500 * i for i in range(count)]}
+    if vectorized:
+        columns = {name: np.array(values) for name, values in columns.items()}
+    batch = dict(columns, symbols=["SPY"] * count, count=count, vectorized=vectorized)
+    metrics.apply_batch("Trade", batch)
+    bars.apply_batch("Trade", batch, ts=1_000_000)
+    technicals.apply_batch("Trade", batch)
+    traded = 500 * (count - 1)
+    assert profile_volume(metrics) == traded
+    assert bars.last("SPY", "1s")["volume"][-1] == traded
+    assert technicals.snapshot("SPY")["vwap"] == pytest.approx(sum(prices[1:]) / (count - 1))
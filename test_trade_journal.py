@@ -0,0 +1,36 @@
+import threading
+import time
+from trade_journal import TradeJournal
+
+
+class SlowJournal(TradeJournal):
+    # Holds the writer thread between taking a batch off the queue and
+    # committing it.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.taken = threading.Event()
+
+    def _write(self, batch):
+        self.taken.set()
+        time.sleep(0.2)
+        super()._write(batch)
+
+
+def test_flush_waits_for_batch_in_flight(tmp_path):
+    journal = SlowJournal(str(tmp_path / "trades.db"), flush_interval=0.05)
+    journal.start()
+    try:
+        journal.append([{"symbol": "EURUSD", "profit": -25.0, "balance": 975.0, "time": "2026.10.18 09:00"}])
+        assert journal.taken.wait(2)
+        journal.flush()
+        assert [trade["symbol"] for trade in journal.recent()] == ["EURUSD"]
+        assert journal.daily_loss(0)["loss"] == 25.0
+    finally:
+        journal.stop()
+
+
+def test_flush_without_writer_thread(tmp_path):
+    journal = TradeJournal(str(tmp_path / "trades.db"))
+    journal.append([{"symbol": "GBPUSD", "profit": 10.0}])
+    journal.flush()
+    assert journal.pnl()[0]["profit"] == 10.0
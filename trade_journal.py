@@ -0,0 +1,219 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+# Anchored to the repo root: webserve imports this from its own directory.
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "forex_trades.db")
+# MT4/MT5 TimeToString formats first; the EAs send broker server time, which
+# is stored as if it were UTC.
+TIME_FORMATS = ("%Y.%m.%d %H:%M:%S", "%Y.%m.%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+COLUMNS = ("received", "ts", "ticket", "symbol", "side", "status", "entry", "sl", "tp", "exit", "lots", "profit", "balance", "outcome", "account", "raw")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    received REAL NOT NULL,
+    ts REAL NOT NULL,
+    ticket INTEGER,
+    symbol TEXT,
+    side TEXT,
+    status TEXT,
+    entry REAL,
+    sl REAL,
+    tp REAL,
+    exit REAL,
+    lots REAL,
+    profit REAL,
+    balance REAL,
+    outcome TEXT,
+    account TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_ts ON trades (ts);
+CREATE INDEX IF NOT EXISTS trades_received ON trades (received);
+CREATE INDEX IF NOT EXISTS trades_symbol_ts ON trades (symbol, ts);
+CREATE INDEX IF NOT EXISTS trades_outcome_ts ON trades (outcome, ts);
+"""
+
+
+def parse_time(value, default):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        for fmt in TIME_FORMATS:
+            try:
+                return datetime.strptime(value.strip(), fmt).replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                continue
+    return default
+
+
+def to_float(value):
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize(trade, received):
+    profit = to_float(trade.get("profit"))
+    outcome = None if profit is None else "win" if profit > 0 else "loss" if profit < 0 else "breakeven"
+    side = str(trade.get("type") or trade.get("side") or "").capitalize() or None
+    ticket = to_float(trade.get("ticket"))
+    return (
+        received,
+        parse_time(trade.get("time"), received),
+        int(ticket) if ticket is not None else None,
+        trade.get("symbol"),
+        side,
+        trade.get("status"),
+        to_float(trade.get("entry")),
+        to_float(trade.get("sl")),
+        to_float(trade.get("tp")),
+        to_float(trade.get("exit")),
+        to_float(trade.get("lots") or trade.get("lot_size")),
+        profit,
+        to_float(trade.get("balance")),
+        outcome,
+        trade.get("account"),
+        json.dumps(trade)
+    )
+
+
+class TradeJournal:
+    # Append-only SQLite journal in WAL mode. append() only enqueues; a
+    # writer thread drains the queue and bulk-inserts each batch in one
+    # transaction. synchronous=NORMAL leaves fsync to WAL checkpoints, so a
+    # burst of EA posts costs one commit rather than one fsync per trade.
+    def __init__(self, path=JOURNAL_PATH, batch_size=500, flush_interval=1.0, max_queue=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"received": 0, "written": 0, "dropped": 0, "batches": 0}
+
+    def append(self, trades):
+        received = time.time()
+        accepted = 0
+        for trade in trades:
+            if not isinstance(trade, dict):
+                continue
+            try:
+                self._queue.put_nowait(normalize(trade, received))
+                accepted += 1
+            except queue.Full:
+                self.stats["dropped"] += 1
+        self.stats["received"] += accepted
+        return accepted
+
+    def _drain(self, block):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        placeholders = ", ".join("?" * len(COLUMNS))
+        try:
+            with self._db_lock, self._db:
+                self._db.executemany(f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({placeholders})", batch)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        finally:
+            # Marked done only once committed (or failed), so flush() can wait
+            # on queue.join() for batches already off the queue.
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_queued(self):
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                break
+            self._write(batch)
+
+    def flush(self):
+        # Returns once everything appended so far is committed, including a
+        # batch the writer thread has taken but not yet written. Readers that
+        # must see a post they just made call this instead of waiting.
+        if self._thread and self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._queue.join()
+        else:
+            self._write_queued()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                try:
+                    self._write(batch)
+                except sqlite3.Error as e:
+                    self.stats["dropped"] += len(batch)
+                    print(f"Trade journal write failed: {e}")
+        self._write_queued()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _query(self, sql, params=()):
+        with self._db_lock:
+            cursor = self._db.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def recent(self, limit=100, symbol=None):
+        where, params = ("WHERE symbol = ?", (symbol,)) if symbol else ("", ())
+        return self._query(f"SELECT {', '.join(COLUMNS[:-1])} FROM trades {where} ORDER BY ts DESC LIMIT ?", params + (limit,))
+
+    def pnl(self, since=0, until=None, symbol=None):
+        # Realized P&L per symbol over closed trades (those that carry a profit).
+        sql = ("SELECT symbol, COUNT(*) AS trades, SUM(outcome = 'win') AS wins, SUM(outcome = 'loss') AS losses, "
+               "ROUND(SUM(profit), 2) AS profit FROM trades WHERE outcome IS NOT NULL AND ts >= ? AND ts < ?")
+        params = [since, until if until is not None else float("inf")]
+        if symbol:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        return self._query(sql + " GROUP BY symbol ORDER BY symbol", params)
+
+    def daily_loss(self, day_start, account=None):
+        # Realized loss since day_start, and as a percentage of the balance
+        # the day started with (latest reported balance plus today's loss).
+        # Windows on receive time: broker clocks run in their own time zone.
+        account_filter, params = ("AND account = ?", (account,)) if account else ("", ())
+        realized = self._query(f"SELECT COALESCE(SUM(profit), 0) AS profit FROM trades WHERE outcome IS NOT NULL AND received >= ? {account_filter}",
+                               (day_start,) + params)[0]["profit"]
+        latest = self._query(f"SELECT balance FROM trades WHERE balance IS NOT NULL {account_filter} ORDER BY received DESC LIMIT 1", params)
+        loss = max(-realized, 0.0)
+        start_balance = latest[0]["balance"] + loss if latest else None
+        return {
+            "profit": round(realized, 2),
+            "loss": round(loss, 2),
+            "loss_pct": round(loss / start_balance * 100, 3) if start_balance else None
+        }
@@ -0,0 +1,188 @@
+import math
+import threading
+import numpy as np
+from dxlink_parser import group_symbols
+
+PROFILE_BINS = 400
+# Starting bin width as a fraction of price (5 bps), snapped to a 1/2/5 step
+# and never finer than a penny, so a $20 ETF and a $500 index get comparable
+# resolution.
+TICK_FRACTION = 0.0005
+VALUE_AREA = 0.7
+MAX_NODES = 3
+
+
+def tick_size(price):
+    raw = abs(price) * TICK_FRACTION
+    if raw <= 0.01:
+        return 0.01
+    magnitude = 10 ** math.floor(math.log10(raw))
+    return min((step * magnitude for step in (1, 2, 5, 10)), key=lambda size: abs(math.log(size / raw)))
+
+
+class VolumeProfile:
+    # Volume-at-price over a fixed number of bins. When a print lands outside
+    # the covered range the bins are re-centred, and the width doubles (folding
+    # existing volume into the wider bins) only when the session's range no
+    # longer fits, so memory stays constant however far price travels.
+    # The POC is kept incrementally; value area and nodes are derived on read.
+    def __init__(self, bins=PROFILE_BINS):
+        self.volumes = np.zeros(bins)
+        self.width = None
+        self.lo = None
+        self.total = 0.0
+        self.poc = 0
+        self._levels = None
+
+    def _start(self, price):
+        self.width = tick_size(price)
+        self.lo = (math.floor(price / self.width) - len(self.volumes) // 2) * self.width
+
+    def _cover(self, low, high):
+        bins = len(self.volumes)
+        if self.lo <= low and high < self.lo + bins * self.width:
+            return
+        # Re-centre on the traded span plus the new prints, doubling the bin
+        # width only while that span does not fit.
+        filled = np.flatnonzero(self.volumes)
+        if len(filled):
+            low = min(low, self.lo + filled[0] * self.width)
+            high = max(high, self.lo + (filled[-1] + 1) * self.width)
+        width = self.width
+        while high - low >= (bins - 2) * width:
+            width *= 2
+        lo = math.floor((low + high) / 2 / width - bins / 2) * width
+        centers = self.lo + (filled + 0.5) * self.width
+        index = ((centers - lo) // width).astype(np.intp)
+        self.volumes = np.bincount(index, weights=self.volumes[filled], minlength=bins)[:bins]
+        self.width, self.lo = width, lo
+        self.poc = int(np.argmax(self.volumes))
+
+    def add(self, price, volume):
+        if price != price or not volume > 0:
+            return
+        if self.width is None:
+            self._start(price)
+        index = int((price - self.lo) // self.width)
+        if not 0 <= index < len(self.volumes):
+            self._cover(price, price)
+            index = int((price - self.lo) // self.width)
+        self.volumes[index] += volume
+        self.total += float(volume)
+        if self.volumes[index] > self.volumes[self.poc]:
+            self.poc = index
+        self._levels = None
+
+    def add_many(self, prices, volumes):
+        valid = ~np.isnan(prices) & (volumes > 0)
+        if not valid.any():
+            return
+        prices, volumes = prices[valid], volumes[valid]
+        if self.width is None:
+            self._start(float(prices[0]))
+        self._cover(float(prices.min()), float(prices.max()))
+        index = ((prices - self.lo) // self.width).astype(np.intp)
+        np.add.at(self.volumes, index, volumes)
+        self.total += float(volumes.sum())
+        top = index[np.argmax(self.volumes[index])]
+        if self.volumes[top] > self.volumes[self.poc]:
+            self.poc = int(top)
+        self._levels = None
+
+    def price_at(self, index):
+        return round(float(self.lo + (index + 0.5) * self.width), 6)
+
+    def _value_area(self, share):
+        # Classic expansion from the POC, taking the heavier neighbour first
+        # until the requested share of session volume is enclosed.
+        volumes = self.volumes
+        low = high = self.poc
+        enclosed = volumes[self.poc]
+        target = self.total * share
+        last = len(volumes) - 1
+        while enclosed < target and (low > 0 or high < last):
+            below = volumes[low - 1] if low > 0 else -1.0
+            above = volumes[high + 1] if high < last else -1.0
+            if above >= below:
+                high += 1
+                enclosed += above
+            else:
+                low -= 1
+                enclosed += below
+        return low, high
+
+    def _nodes(self):
+        filled = np.flatnonzero(self.volumes)
+        first, last = filled[0], filled[-1]
+        if last - first < 2:
+            return [], []
+        smooth = np.convolve(self.volumes[first:last + 1], (0.25, 0.5, 0.25), mode="same")
+        inner = smooth[1:-1]
+        peaks = np.flatnonzero((inner > smooth[:-2]) & (inner >= smooth[2:])) + 1
+        troughs = np.flatnonzero((inner < smooth[:-2]) & (inner <= smooth[2:])) + 1
+        peaks = peaks[np.argsort(smooth[peaks])[::-1][:MAX_NODES]]
+        troughs = troughs[np.argsort(smooth[troughs])[:MAX_NODES]]
+        return ([self.price_at(first + i) for i in sorted(peaks)],
+                [self.price_at(first + i) for i in sorted(troughs)])
+
+    def levels(self, share=VALUE_AREA):
+        if self._levels is None and self.total > 0:
+            low, high = self._value_area(share)
+            hvn, lvn = self._nodes()
+            self._levels = {
+                "poc": self.price_at(self.poc),
+                "vah": round(float(self.lo + (high + 1) * self.width), 6),
+                "val": round(float(self.lo + low * self.width), 6),
+                "hvn": hvn,
+                "lvn": lvn,
+                "tick": round(self.width, 6),
+                "volume": round(self.total, 2)
+            }
+        return self._levels
+
+    def histogram(self):
+        filled = np.flatnonzero(self.volumes)
+        if not len(filled):
+            return []
+        return [[self.price_at(i), float(self.volumes[i])] for i in range(filled[0], filled[-1] + 1)]
+
+
+class VolumeProfileBook:
+    # One session profile per symbol, fed from the Trade path of the stream.
+    def __init__(self, bins=PROFILE_BINS):
+        self.bins = bins
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def _profile(self, symbol):
+        profile = self._profiles.get(symbol)
+        if profile is None:
+            profile = self._profiles[symbol] = VolumeProfile(self.bins)
+        return profile
+
+    def add(self, symbol, price, volume):
+        with self._lock:
+            self._profile(symbol).add(price, volume)
+
+    def add_batch(self, symbols, prices, volumes):
+        names, inverse = group_symbols(symbols)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(names)))[:-1]
+        with self._lock:
+            for name, group in zip(names, np.split(order, bounds)):
+                self._profile(name).add_many(prices[group], volumes[group])
+
+    def levels(self, symbols):
+        with self._lock:
+            return {symbol: self._profiles[symbol].levels() for symbol in symbols if symbol in self._profiles}
+
+    def snapshot(self, symbol):
+        with self._lock:
+            profile = self._profiles.get(symbol)
+            if profile is None:
+                return None
+            return dict(profile.levels() or {}, histogram=profile.histogram())
+
+    def reset(self):
+        with self._lock:
+            self._profiles = {}
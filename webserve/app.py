@@ -1,160 +1,281 @@
 from flask import Flask, render_template, jsonify, request
 import sys
 import os
-import smtplib
-from email.mime.text import MIMEText
 import threading
 import time
 from datetime import datetime, timezone, timedelta
 sys.path.append(os.path.abspath("../code"))
+sys.path.append(os.path.abspath(".."))
 from trading_logic import authenticate, get_market_data, fetch_history_once, check_news, build_butterfly, evaluate_trade, strategy_settings
 from logging_config import setup_logging
+from bar_aggregator import BarAggregator
+from technicals import TechnicalsEngine, DEFAULT_PERIODS
+from breakout_triggers import TriggerEngine
+from stream_manager import StreamManager, EVENT_FIELDS
+from dxlink_parser import CompactParser
+from news_cache import QueryCache
+from notifier import NotificationDispatcher, sinks_from_env
+from trade_journal import TradeJournal
+import http_client
+import backtest
 
 app = Flask(__name__)
 logger = setup_logging()
 
-active_positions = []
-breakout_status = {"/MES": "Pending", "/MNQ": "Pending", "^GSPC": "Pending", "^NDX": "Pending", "/CL": "Pending", "/GC": "Pending"}
+BREAKOUT_SYMBOLS = ["/MES", "/MNQ", "^GSPC", "^NDX", "/CL", "/GC"]
+MARKET_SYMBOLS = ["TLT", "GLD", "SPY", "^VIX"] + BREAKOUT_SYMBOLS
+# DXLink names for the index symbols; futures resolve to their active
+# contract at startup and everything else streams under its own name.
+INDEX_STREAMER_SYMBOLS = {"^GSPC": "SPX", "^NDX": "NDX", "^VIX": "VIX"}
+DASHBOARD_SYMBOLS = ["TLT", "GLD", "SPY"]
+POLL_INTERVAL = 30
+CLOCK_INTERVAL = 20
+DASHBOARD_REFRESH = 15
+MAX_TRADES_LIMIT = 1000
+# Seconds each dashboard input stays fresh; gaps are fixed once the session
+# has opened and news/butterflies move far slower than quotes.
+DASHBOARD_TTLS = {"auth": 20 * 3600, "market": 15, "gap": 3600, "news": 300, "butterfly": 300}
+
+dashboard_cache = {component: QueryCache(ttl=ttl, max_entries=64) for component, ttl in DASHBOARD_TTLS.items()}
+dashboard_snapshot = None
+dashboard_lock = threading.Lock()
+# Booked butterflies keyed by (symbol, strikes, expiration).
+active_positions = {}
+closed_positions = set()
+positions_lock = threading.Lock()
+breakout_status = dict.fromkeys(BREAKOUT_SYMBOLS, "Pending")
+breakout_levels = {}
+breakout_outcomes = {}
+stream_symbol_map = {}
+feed_parser = CompactParser(EVENT_FIELDS)
 forex_strategy_settings = {
     "FastEMA_Period": 20, "SlowEMA_Period": 50, "RSI_Period": 14, "LotSize": 0.01,
     "StopLossPips": 20, "TakeProfitPips": 40, "MaxDailyLoss": 3.0, "StartHourCST": 2, "EndHourCST": 9
 }
-forex_trades = []
+trade_journal = TradeJournal()
+notifier = NotificationDispatcher(sinks_from_env())
+price_bars = BarAggregator()
+ROC_MINUTES = 10
 
-def send_notification(subject, body):
-    sender = os.getenv("EMAIL_SENDER")
-    password = os.getenv("EMAIL_PASSWORD")
-    receiver = os.getenv("EMAIL_RECEIVER")
-    
-    if all([sender, password, receiver]):
-        msg = MIMEText(body)
-        msg["Subject"] = subject
-        msg["From"] = sender
-        msg["To"] = receiver
-        logger.info(f"Attempting email notification to {receiver}: {subject}")
-        try:
-            with smtplib.SMTP("smtp.gmail.com", 587) as server:
-                server.starttls()
-                server.login(sender, password)
-                server.send_message(msg)
-            logger.info(f"Email notification sent to {receiver}")
-            print(f"Email notification sent to {receiver}")
-        except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            print(f"Failed to send email: {e}")
-    else:
+def technical_periods():
+    return {key: forex_strategy_settings[key] for key in DEFAULT_PERIODS if key in forex_strategy_settings}
+
+technicals = TechnicalsEngine(technical_periods())
+price_bars.add_listener("1m", technicals.on_bar)
+
+def rebuild_technicals():
+    # New periods invalidate every indicator; replay the 1m bars already held.
+    technicals.set_periods(technical_periods())
+    for symbol in price_bars.symbols():
+        technicals.backfill(symbol, price_bars.since(symbol, "1m", 0)[:-1].copy())
+
+def send_notification(subject, body, key=None):
+    # Queued for the dispatcher thread; `key` (symbol, direction) lets repeats
+    # of the same alert collapse instead of mailing twice.
+    if not notifier.sinks:
         logger.warning("Email config missing in .env—skipping notification")
         print("Email config missing in .env—skipping notification")
+        return
+    logger.info(f"Queued notification: {subject}")
+    notifier.notify(subject, body, key)
+
+def fetch_quote_token(token):
+    response = http_client.get("https://api.tastytrade.com/api-quote-tokens", headers={"Authorization": token})
+    response.raise_for_status()
+    return response.json()["data"]["token"]
+
+def stream_quote_token(force=False):
+    # force comes from a shard whose token DXLink rejected; the cached
+    # session token may be what expired, so log in again before asking.
+    if force:
+        dashboard_cache["auth"].invalidate("token")
+    return fetch_quote_token(auth_token())
+
+def futures_streamer_symbol(token, symbol):
+    response = http_client.get("https://api.tastytrade.com/instruments/futures", params={"product-code[]": symbol[1:]},
+                               headers={"Authorization": token})
+    response.raise_for_status()
+    items = response.json()["data"]["items"]
+    active = [item for item in items if item.get("active-month")] or items
+    return active[0]["streamer-symbol"]
+
+def streamer_symbols(token):
+    symbols = {}
+    for symbol in MARKET_SYMBOLS:
+        if symbol.startswith("/"):
+            try:
+                symbols[symbol] = futures_streamer_symbol(token, symbol)
+            except Exception as e:
+                logger.error(f"Failed to resolve streamer symbol for {symbol}: {e}")
+        else:
+            symbols[symbol] = INDEX_STREAMER_SYMBOLS.get(symbol, symbol)
+    return symbols
+
+def on_stream_message(ws, message):
+    for event_type, batch in feed_parser.parse_message(message):
+        batch["symbols"] = [stream_symbol_map.get(symbol, symbol) for symbol in batch["symbols"]]
+        breakout_triggers.apply_batch(event_type, batch)
+        price_bars.apply_batch(event_type, batch)
+        technicals.apply_batch(event_type, batch)
+
+def start_breakout_stream(token):
+    global stream_symbol_map
+    try:
+        symbols = streamer_symbols(token)
+        quote_token = fetch_quote_token(token)
+    except Exception as e:
+        logger.error(f"Failed to start the breakout stream, polling instead: {e}")
+        return None
+    stream_symbol_map = {streamer: symbol for symbol, streamer in symbols.items()}
+    manager = StreamManager(quote_token, on_stream_message, token_provider=stream_quote_token)
+    manager.start(list(symbols.values()))
+    logger.info(f"Breakout stream started for {symbols}")
+    return manager
+
+def refresh_breakout_levels(new_session=False):
+    # The only place evaluate_trade runs for the monitor: once per session and
+    # again when strategy_settings change. Symbols that already triggered this
+    # session stay disarmed. The dashboard reads the same evaluation.
+    global breakout_levels, breakout_outcomes
+    outcomes, breakouts = evaluate_trade(False)
+    breakout_levels, breakout_outcomes = breakouts, outcomes
+    for symbol in BREAKOUT_SYMBOLS:
+        if new_session:
+            breakout_status[symbol] = "Pending"
+        breakout = breakouts.get(symbol)
+        if breakout and breakout_status[symbol] == "Pending":
+            breakout_triggers.set_triggers(symbol, [
+                {"direction": "above", "level": breakout["breakout_up"], "side": "Long"},
+                {"direction": "below", "level": breakout["breakout_down"], "side": "Short"}
+            ])
+        else:
+            breakout_triggers.disarm(symbol)
+            if not breakout:
+                logger.warning(f"No breakout levels for {symbol}")
+    logger.info(f"Breakout levels armed: {breakout_triggers.armed()}")
+
+def on_breakout(symbol, trigger, price):
+    if breakout_status.get(symbol) != "Pending":
+        return
+    side = trigger["side"]
+    breakout_status[symbol] = f"{side} Triggered"
+    breakout_triggers.disarm(symbol)
+    breakout = breakout_levels[symbol]
+    trade = breakout["long" if side == "Long" else "short"]
+    logger.info(f"{symbol} {side} breakout at {price} through {trigger['level']}")
+    body = f"{symbol} Breakout {side}:\nEntry: {trade['entry']}\nTarget: {trade['target']}\nStop: {trade['stop']}\nBest Hour: {breakout['best_hour_cst']} CST\nProbability: {breakout['probability']:.2f}"
+    send_notification(f"{symbol} Breakout Alert", body, key=(symbol, side))
+
+breakout_triggers = TriggerEngine(on_breakout)
+
+def send_open_alert():
+    highest_prob = None
+    highest_prob_symbol = None
+    for symbol, breakout in breakout_levels.items():
+        if breakout is None or breakout_triggers.last_price(symbol) is None:
+            continue
+        if highest_prob is None or breakout["probability"] > highest_prob:
+            highest_prob = breakout["probability"]
+            highest_prob_symbol = symbol
+    if not highest_prob_symbol:
+        return False
+    breakout = breakout_levels[highest_prob_symbol]
+    price = breakout_triggers.last_price(highest_prob_symbol)
+    window = price_bars.since(highest_prob_symbol, "1m", time.time() - ROC_MINUTES * 60)
+    full_window = len(window) and window["ts"][0] <= time.time() - (ROC_MINUTES - 1) * 60
+    roc = (price - float(window["open"][0])) / ROC_MINUTES if full_window else 0
+    
+    trade_type = "Short" if price < breakout["breakout_down"] else "Long"
+    trade = breakout["short"] if trade_type == "Short" else breakout["long"]
+    body = (f"10am CST Trade Alert:\n"
+            f"Anticipated Trade: {highest_prob_symbol} {trade_type}\n"
+            f"Price Level: {price:.2f}\n"
+            f"Entry: {trade['entry']:.2f}, Target: {trade['target']:.2f}, Stop: {trade['stop']:.2f}\n"
+            f"10-min Rate of Change: {roc:.2f} points/min\n"
+            f"Probability: {highest_prob:.2f}")
+    send_notification(f"{highest_prob_symbol} 10am CST Alert", body, key=(highest_prob_symbol, "open"))
+    return True
 
 def monitor_breakouts():
-    global breakout_status
-    token = authenticate()
-    last_price = {"/MES": None, "/MNQ": None, "^GSPC": None, "^NDX": None, "/CL": None, "/GC": None}
-    price_history = {"/MES": [], "/MNQ": [], "^GSPC": [], "^NDX": [], "/CL": [], "/GC": []}
+    # Breakouts fire from the stream via breakout_triggers; this loop is only
+    # a clock for the session roll and the 9:55 alert. Without a stream it
+    # polls prices into the same engine.
+    token = auth_token()
+    stream = start_breakout_stream(token)
+    session = None
     last_alert_sent = None
     
     while True:
-        market_data, _ = get_market_data(token, symbols=["TLT", "GLD", "SPY", "^VIX", "/MES", "/MNQ", "^GSPC", "^NDX", "/CL", "/GC"])
-        logger.info(f"Market data fetched: {market_data.keys()}")
-        _, breakouts = evaluate_trade(False)
-        logger.info(f"Breakouts computed: {breakouts.keys()}")
-        
-        if not market_data:
-            logger.warning("No market data available—skipping iteration")
-            time.sleep(30)
-            continue
-        
         now = datetime.now(timezone.utc) - timedelta(hours=6)  # CST
-        cst_hour, cst_min = now.hour, now.minute
+        if now.date() != session:
+            session = now.date()
+            refresh_breakout_levels(new_session=True)
         
-        if cst_hour == 9 and cst_min >= 55 and cst_min <= 56 and last_alert_sent != now.date():
-            highest_prob = None
-            highest_prob_symbol = None
-            for symbol, breakout in breakouts.items():
-                if breakout is None:  # Skip None values
-                    continue
-                if highest_prob is None or breakout["probability"] > highest_prob:
-                    highest_prob = breakout["probability"]
-                    highest_prob_symbol = symbol
-            
-            if highest_prob_symbol:
-                breakout = breakouts[highest_prob_symbol]
-                price = market_data[highest_prob_symbol]["price"]
-                price_history[highest_prob_symbol].append(price)
-                if len(price_history[highest_prob_symbol]) > 20:
-                    price_history[highest_prob_symbol].pop(0)
-                roc = (price - price_history[highest_prob_symbol][0]) / 10 if len(price_history[highest_prob_symbol]) >= 20 else 0
-                
-                trade_type = "Short" if price < breakout["breakout_down"] else "Long"
-                trade = breakout["short"] if trade_type == "Short" else breakout["long"]
-                body = (f"10am CST Trade Alert:\n"
-                        f"Anticipated Trade: {highest_prob_symbol} {trade_type}\n"
-                        f"Price Level: {price:.2f}\n"
-                        f"Entry: {trade['entry']:.2f}, Target: {trade['target']:.2f}, Stop: {trade['stop']:.2f}\n"
-                        f"10-min Rate of Change: {roc:.2f} points/min\n"
-                        f"Probability: {highest_prob:.2f}")
-                send_notification(f"{highest_prob_symbol} 10am CST Alert", body)
-                last_alert_sent = now.date()
+        if stream is None:
+            market_data, _ = get_market_data(token, symbols=MARKET_SYMBOLS)
+            if not market_data:
+                logger.warning("No market data available—skipping iteration")
+            for symbol, data in market_data.items():
+                price_bars.on_trade(symbol, data["price"])
+                technicals.on_tick(symbol, data["price"])
+                breakout_triggers.on_tick(symbol, data["price"])
         
-        for symbol in ["/MES", "/MNQ", "^GSPC", "^NDX", "/CL", "/GC"]:
-            if symbol in breakouts and breakouts[symbol] and symbol in market_data:
-                breakout = breakouts[symbol]
-                price = market_data[symbol]["price"]
-                last_price[symbol] = price
-                
-                if price > breakout["breakout_up"] and breakout_status[symbol] == "Pending":
-                    breakout_status[symbol] = "Long Triggered"
-                    trade = breakout["long"]
-                    body = f"{symbol} Breakout Long:\nEntry: {trade['entry']}\nTarget: {trade['target']}\nStop: {trade['stop']}\nBest Hour: {breakout['best_hour_cst']} CST\nProbability: {breakout['probability']:.2f}"
-                    send_notification(f"{symbol} Breakout Alert", body)
-                elif price < breakout["breakout_down"] and breakout_status[symbol] == "Pending":
-                    breakout_status[symbol] = "Short Triggered"
-                    trade = breakout["short"]
-                    body = f"{symbol} Breakout Short:\nEntry: {trade['entry']}\nTarget: {trade['target']}\nStop: {trade['stop']}\nBest Hour: {breakout['best_hour_cst']} CST\nProbability: {breakout['probability']:.2f}"
-                    send_notification(f"{symbol} Breakout Alert", body)
-            else:
-                logger.warning(f"No breakout or price data for {symbol}")
+        if now.hour == 9 and 55 <= now.minute <= 56 and last_alert_sent != now.date():
+            if send_open_alert():
+                last_alert_sent = now.date()
         
-        time.sleep(30)
+        time.sleep(POLL_INTERVAL if stream is None else CLOCK_INTERVAL)
+
+def auth_token():
+    return dashboard_cache["auth"].get_or_load("token", authenticate)
+
+def cached(component, key, loader):
+    return dashboard_cache[component].get_or_load(key, loader)
+
+def position_key(position):
+    return (position["symbol"], position.get("lower_strike"), position.get("atm_strike"), position.get("upper_strike"), position.get("expiration"))
+
+def add_position(position):
+    # Refreshes keep proposing the same butterfly; it is booked once, and one
+    # closed by hand stays closed.
+    key = position_key(position)
+    with positions_lock:
+        if key in active_positions or key in closed_positions:
+            return False
+        active_positions[key] = position
+    print(f"Added butterfly for {position['symbol']}: {position}")
+    return True
 
 def fetch_dashboard_data():
-    token = authenticate()
-    market_data, vix = get_market_data(token, symbols=["TLT", "GLD", "SPY", "^VIX", "/MES", "/MNQ", "^GSPC", "^NDX", "/CL", "/GC"])
-    outcomes, breakouts = evaluate_trade(False)
+    # Every upstream call goes through a per-component TTL cache, so the
+    # background refresh only hits the APIs whose data has gone stale.
+    token = auth_token()
+    market_data, vix = cached("market", "all", lambda: get_market_data(token, symbols=MARKET_SYMBOLS))
+    # The levels the monitor armed, not a separate evaluate_trade run that
+    # could disagree with what will actually fire.
+    outcomes, breakouts = breakout_outcomes, breakout_levels
     logger.info(f"Dashboard breakouts: {breakouts.keys()}")
-    
-    symbols = ["TLT", "GLD", "SPY"]
-    futures = ["/MES", "/MNQ", "^GSPC", "^NDX", "/CL", "/GC"]
-    
-    now_utc = datetime.now(timezone.utc)
-    est_time = now_utc - timedelta(hours=5)
-    cst_time = now_utc - timedelta(hours=6)
-    est_time_str = est_time.strftime('%I:%M:%S %p').lstrip('0')
-    cst_time_str = cst_time.strftime('%I:%M:%S %p').lstrip('0')
+    has_news = cached("news", "all", check_news)
     
     assets = {}
-    print(f"Fetching assets for {symbols}")
-    for symbol in symbols:
+    for symbol in DASHBOARD_SYMBOLS:
         if symbol not in market_data:
             logger.warning(f"No market data for {symbol}—skipping asset")
             assets[symbol] = {"price": 0, "gap": 0, "criteria_met": False, "butterfly": None}
             continue
         price = market_data[symbol]["price"]
-        gap_percent = fetch_history_once(token, symbol)
-        gap_percent_rounded = round(gap_percent, 2)
-        has_news = check_news()
-        butterfly = build_butterfly(token, symbol, price, market_data[symbol]["iv"], vix) if not has_news else None
-        if butterfly and outcomes[symbol] == "Simulated win":
-            active_positions.append(butterfly)
-            print(f"Added butterfly for {symbol}: {butterfly}")
+        gap_percent_rounded = round(cached("gap", symbol, lambda: fetch_history_once(token, symbol)), 2)
+        butterfly = None
+        if not has_news:
+            butterfly = cached("butterfly", symbol, lambda: build_butterfly(token, symbol, price, market_data[symbol]["iv"], vix))
+        if butterfly and outcomes.get(symbol) == "Simulated win":
+            add_position(butterfly)
         assets[symbol] = {
             "price": price,
             "gap": gap_percent_rounded,
             "criteria_met": 0.05 <= abs(gap_percent_rounded) <= 1 and not has_news,
             "butterfly": butterfly
         }
-    print(f"Assets populated: {assets}")
-    print(f"Active positions: {active_positions}")
     
     highest_prob = None
     highest_prob_symbol = None
@@ -173,33 +294,98 @@ def fetch_dashboard_data():
         "assets": assets,
         "vix": vix,
         "gap_criteria": "0.05% - 1%",
-        "active_positions": active_positions,
         "breakouts": breakouts,
-        "breakout_status": breakout_status,
-        "est_time": est_time_str,
-        "cst_time": cst_time_str,
         "highest_prob_symbol": highest_prob_symbol,
-        "recommendation": recommendation
+        "recommendation": recommendation,
+        "updated": time.time()
     }
 
+def refresh_dashboard():
+    global dashboard_snapshot
+    with dashboard_lock:
+        try:
+            dashboard_snapshot = fetch_dashboard_data()
+        except Exception as e:
+            logger.error(f"Dashboard refresh failed: {e}")
+    return dashboard_snapshot
+
+def dashboard_refresher():
+    while True:
+        refresh_dashboard()
+        time.sleep(DASHBOARD_REFRESH)
+
+def dashboard_view():
+    # The cached snapshot plus the parts that are live anyway: clocks,
+    # breakout status and the position book.
+    snapshot = dashboard_snapshot or refresh_dashboard()
+    if snapshot is None:
+        return None
+    now_utc = datetime.now(timezone.utc)
+    with positions_lock:
+        positions = list(active_positions.values())
+    return dict(snapshot,
+                est_time=(now_utc - timedelta(hours=5)).strftime('%I:%M:%S %p').lstrip('0'),
+                cst_time=(now_utc - timedelta(hours=6)).strftime('%I:%M:%S %p').lstrip('0'),
+                breakout_status=dict(breakout_status),
+                active_positions=positions)
+
 @app.route('/')
 def dashboard():
-    data = fetch_dashboard_data()
-    logger.info(f"Data sent to template: {data['breakouts'].keys()}")
+    data = dashboard_view()
+    if data is None:
+        return "Dashboard data unavailable, retrying shortly", 503
     return render_template('index.html', data=data)
 
+@app.route('/dashboard.json')
+def dashboard_json():
+    data = dashboard_view()
+    if data is None:
+        return jsonify({"error": "Dashboard data unavailable"}), 503
+    return jsonify(data)
+
 @app.route('/monitor')
 def monitor():
     return jsonify(breakout_status)
 
+@app.route('/breakout_triggers')
+def breakout_triggers_json():
+    return jsonify({"armed": breakout_triggers.armed(), "stats": breakout_triggers.stats})
+
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
     if request.method == 'POST':
         strategy_settings["prob_scaler"] = float(request.form.get("prob_scaler", 0.2))
         strategy_settings["rr_ratio"] = float(request.form.get("rr_ratio", 2.0))
+        refresh_breakout_levels()
+        refresh_dashboard()
         return jsonify({"message": "Futures settings updated", "settings": strategy_settings})
     return render_template('settings.html', settings=strategy_settings)
 
+@app.route('/backtest')
+def backtest_sweep():
+    # e.g. /backtest?symbols=/MES,/CL&rr_ratio=1.5,2,3 sweeps over the default
+    # grid with any axis overridden; the current settings are scored alongside.
+    symbols = [symbol for symbol in request.args.get("symbols", ",".join(backtest.BACKTEST_SYMBOLS)).split(",") if symbol]
+    try:
+        days = int(request.args.get("days", backtest.BACKTEST_DAYS))
+        top = int(request.args.get("top", 25))
+        grid = {}
+        for axis in backtest.DEFAULT_GRID:
+            if axis in request.args:
+                grid[axis] = [(int if axis == "range_minutes" else float)(value) for value in request.args[axis].split(",")]
+        if days < 1 or top < 1 or not all(0 < value < float("inf") for values in grid.values() for value in values):
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "days, top and range_minutes must be positive integers; prob_scaler and rr_ratio positive numbers"}), 400
+    sessions = backtest.load_sessions(symbols, min(days, backtest.BACKTEST_DAYS))
+    if sessions is None:
+        return jsonify({"error": "No cached bars for the requested symbols"}), 404
+    started = time.time()
+    rows = backtest.sweep(sessions, grid)
+    current = backtest.evaluate(sessions, backtest.DEFAULT_RANGE_MINUTES, strategy_settings.get("prob_scaler", 0.2), strategy_settings.get("rr_ratio", 2.0))
+    logger.info(f"Backtest sweep of {len(rows)} parameter sets over {len(sessions['day'])} sessions in {time.time() - started:.2f}s")
+    return jsonify({"current": current, "results": rows[:top], "sessions": len(sessions["day"])})
+
 @app.route('/forex_settings', methods=['GET', 'POST'])
 def forex_settings():
     if request.method == 'POST':
@@ -212,6 +398,7 @@ def forex_settings():
         forex_strategy_settings["MaxDailyLoss"] = float(request.form.get("MaxDailyLoss", 3.0))
         forex_strategy_settings["StartHourCST"] = int(request.form.get("StartHourCST", 2))
         forex_strategy_settings["EndHourCST"] = int(request.form.get("EndHourCST", 9))
+        rebuild_technicals()
         return jsonify({"message": "Forex settings updated", "settings": forex_strategy_settings})
     return render_template('forex_settings.html', settings=forex_strategy_settings)
 
@@ -219,27 +406,75 @@ def forex_settings():
 def forex_settings_json():
     return jsonify(forex_strategy_settings)
 
-@app.route('/forex_trades', methods=['POST'])
+@app.route('/technicals')
+def technicals_json():
+    return jsonify(technicals.snapshots())
+
+def daily_loss_status(account=None):
+    # The EA's MaxDailyLoss check, done server-side over the journal for the
+    # current CST day.
+    now_cst = datetime.now(timezone.utc) - timedelta(hours=6)
+    day_start = now_cst.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc) + timedelta(hours=6)
+    status = trade_journal.daily_loss(day_start.timestamp(), account)
+    status["max_daily_loss"] = forex_strategy_settings["MaxDailyLoss"]
+    status["halted"] = status["loss_pct"] is not None and status["loss_pct"] >= forex_strategy_settings["MaxDailyLoss"]
+    return status
+
+@app.route('/forex_trades', methods=['GET', 'POST'])
 def forex_trades():
-    trade_data = request.get_json()
-    forex_trades.append(trade_data)
-    logger.info(f"Received forex trade: {trade_data}")
-    print(f"Received forex trade: {trade_data}")
-    return jsonify({"message": "Trade logged", "trade": trade_data})
+    if request.method == 'GET':
+        try:
+            limit = int(request.args.get("limit", 100))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        return jsonify(trade_journal.recent(min(max(limit, 1), MAX_TRADES_LIMIT), request.args.get("symbol")))
+    payload = request.get_json(silent=True)
+    trades = payload if isinstance(payload, list) else [payload]
+    count = trade_journal.append(trades)
+    if not count:
+        return jsonify({"error": "Expected a trade object or an array of them"}), 400
+    logger.info(f"Received {count} forex trade(s)")
+    if any(isinstance(trade, dict) and trade.get("profit") is not None for trade in trades):
+        # Closed trades move the daily loss; land them before answering.
+        trade_journal.flush()
+    account = trades[0].get("account") if isinstance(trades[0], dict) else None
+    return jsonify(dict(daily_loss_status(account), message=f"{count} trade(s) logged", count=count))
+
+@app.route('/forex_pnl')
+def forex_pnl():
+    try:
+        since = float(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "since must be a unix timestamp"}), 400
+    return jsonify(trade_journal.pnl(since, symbol=request.args.get("symbol")))
+
+@app.route('/forex_daily_loss')
+def forex_daily_loss():
+    return jsonify(daily_loss_status(request.args.get("account")))
 
 @app.route('/close/<symbol>')
 def close_trade(symbol):
-    global active_positions
-    active_positions = [pos for pos in active_positions if pos["symbol"] != symbol]
+    with positions_lock:
+        for key in [key for key in active_positions if key[0] == symbol]:
+            closed_positions.add(key)
+            del active_positions[key]
     return {"message": f"Closed {symbol} at market (simulated)"}
 
 @app.route('/close_all')
 def close_all_trades():
-    global active_positions
-    closed = len(active_positions)
-    active_positions = []
+    with positions_lock:
+        closed = len(active_positions)
+        closed_positions.update(active_positions)
+        active_positions.clear()
     return {"message": f"Closed all {closed} trades at market (simulated)"}
 
+@app.route('/notifier_stats')
+def notifier_stats():
+    return jsonify(notifier.stats)
+
 if __name__ == '__main__':
+    notifier.start()
+    trade_journal.start()
     threading.Thread(target=monitor_breakouts, daemon=True).start()
+    threading.Thread(target=dashboard_refresher, daemon=True).start()
     app.run(debug=True, host='0.0.0.0', port=5010)  # Note: You said 5000, but code uses 5010—stick with 5010?
\ No newline at end of file